@@ -0,0 +1,91 @@
+from typing import Tuple
+
+from PyQt5.QtCore import QEvent, QModelIndex, QRect, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QFont, QFontMetrics, QPainter
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton, QStyleOptionViewItem
+
+from .layer_tree_model import LayerTreeModel
+from ..utils.icon_cache import IconCache
+
+
+class LayerTreeDelegate(QStyledItemDelegate):
+    """
+    Paints the rows of LayerTreeModel like the former item widgets: folder icon (groups), label, check button and
+    the buttons to move the row up and down. Only the visible rows are painted, no widget is created per row.
+    Clicks on the buttons are emitted with checkClicked and moveClicked. The icons come from IconCache, scaled for
+    the pixel ratio of the painted device.
+    """
+
+    ROW_HEIGHT = 40
+    ICON_WIDTH = 25
+    ICON_HEIGHT = 25
+    MOVE_BTN_WIDTH = 30
+    BTN_CHECK_WIDTH = 50
+    SPACING = 1
+    PADDING = 4
+
+    checkClicked = pyqtSignal(QModelIndex)
+    moveClicked = pyqtSignal(QModelIndex, bool)
+
+    def __init__(self, font: QFont, parent=None):
+        super().__init__(parent)
+        self.font = font
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        isGroup: bool = index.data(LayerTreeModel.IS_GROUP_ROLE)
+        folderRect, labelRect, checkRect, upRect, downRect = self._getRects(option.rect, isGroup)
+        style = option.widget.style() if option.widget else QApplication.style()
+        ratio: float = painter.device().devicePixelRatioF()
+
+        painter.save()
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, option, painter, option.widget)
+        if isGroup:
+            painter.drawPixmap(folderRect.topLeft(),
+                               IconCache.pixmap('folder.png', QSize(self.ICON_WIDTH, self.ICON_HEIGHT), ratio))
+        painter.setFont(self.font)
+        painter.drawText(labelRect, Qt.AlignVCenter | Qt.TextWordWrap, index.data(Qt.DisplayRole))
+
+        iconRect = checkRect.adjusted(5, 5, -5, -5)
+        iconName = 'checkbox.png' if index.data(Qt.CheckStateRole) == Qt.Checked else 'checkbox_dis.png'
+        IconCache.icon(iconName, iconRect.size(), ratio).paint(painter, iconRect)
+
+        for rect, text in ((upRect, "↑"), (downRect, "↓")):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = text
+            button.state = QStyle.State_Enabled | QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+        painter.restore()
+
+    def editorEvent(self, event: QEvent, model, option: QStyleOptionViewItem, index: QModelIndex) -> bool:
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            _, _, checkRect, upRect, downRect = self._getRects(option.rect, index.data(LayerTreeModel.IS_GROUP_ROLE))
+            if checkRect.contains(event.pos()):
+                self.checkClicked.emit(index)
+                return True
+            if upRect.contains(event.pos()) or downRect.contains(event.pos()):
+                self.moveClicked.emit(index, upRect.contains(event.pos()))
+                return True
+        return super().editorEvent(event, model, option, index)
+
+    def labelWidth(self, text: str) -> int:
+        """Width of a label, used for the width of the left panel"""
+        return QFontMetrics(self.font).horizontalAdvance(text)
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _getRects(self, rect: QRect, isGroup: bool) -> Tuple[QRect, QRect, QRect, QRect, QRect]:
+        """Rectangles of folder icon, label, check button, up and down button in a row"""
+        downRect = QRect(rect.right() - self.MOVE_BTN_WIDTH + 1, rect.top() + 5, self.MOVE_BTN_WIDTH,
+                         rect.height() - 10)
+        upRect = downRect.translated(-(self.MOVE_BTN_WIDTH + self.SPACING), 0)
+        checkRect = QRect(upRect.left() - self.SPACING - self.BTN_CHECK_WIDTH, rect.top(), self.BTN_CHECK_WIDTH,
+                          rect.height())
+        folderWidth = self.ICON_WIDTH if isGroup else 0
+        folderRect = QRect(rect.left(), rect.top() + (rect.height() - self.ICON_HEIGHT) // 2, folderWidth,
+                           self.ICON_HEIGHT)
+        labelLeft = folderRect.right() + 1 + self.PADDING
+        labelRect = QRect(labelLeft, rect.top(), checkRect.left() - self.PADDING - labelLeft, rect.height())
+        return folderRect, labelRect, checkRect, upRect, downRect
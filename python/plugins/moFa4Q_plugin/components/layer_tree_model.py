@@ -0,0 +1,189 @@
+from typing import Any, Callable, List, Optional
+
+from PyQt5.QtCore import QAbstractItemModel, QModelIndex, Qt
+from qgis.core import QgsLayerTreeGroup, QgsLayerTreeLayer, QgsLayerTreeNode
+
+
+class LayerTreeItem:
+    """Item of LayerTreeModel: a node of the qgis layer tree with the items of its children
+    id (layer id of a layer, name of a group) is read when the node is set, so an item can still be found when its
+    node has already been deleted in the qgis layer tree.
+    """
+
+    __slots__ = ('node', 'parent', 'children', 'id')
+
+    def __init__(self, node: QgsLayerTreeNode, parent: Optional['LayerTreeItem']):
+        self.parent = parent
+        self.setNode(node)
+        self.children: List[LayerTreeItem] = [LayerTreeItem(child, self) for child in node.children()]
+
+    def setNode(self, node: QgsLayerTreeNode) -> None:
+        self.node = node
+        self.id: str = node.layerId() if isinstance(node, QgsLayerTreeLayer) else node.name()
+
+
+class LayerTreeModel(QAbstractItemModel):
+    """
+    Model of a part of the qgis layer tree (e.g. the groups of the public layers), shown with LayerTreeDelegate.
+    The top level rows are the given nodes (children of the root), their children are all the child nodes.
+    The model creates no widgets: only the visible rows are painted by the delegate.
+    The check state is the visibility (itemVisibilityChecked) of the node.
+    """
+
+    NODE_ROLE = Qt.UserRole + 1
+    IS_GROUP_ROLE = Qt.UserRole + 2
+
+    def __init__(self, nodes: List[QgsLayerTreeNode]):
+        super().__init__()
+        self._items: List[LayerTreeItem] = [LayerTreeItem(node, None) for node in nodes]
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        siblings = self._children(parent)
+        if column != 0 or not 0 <= row < len(siblings):
+            return QModelIndex()
+        return self.createIndex(row, 0, siblings[row])
+
+    def parent(self, index: QModelIndex) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        parentItem: Optional[LayerTreeItem] = index.internalPointer().parent
+        if parentItem is None:
+            return QModelIndex()
+        return self.createIndex(self._siblings(parentItem).index(parentItem), 0, parentItem)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self._children(parent))
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 1
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        node: QgsLayerTreeNode = index.internalPointer().node
+        if role == Qt.DisplayRole:
+            return node.name()
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if node.itemVisibilityChecked() else Qt.Unchecked
+        if role == self.NODE_ROLE:
+            return node
+        if role == self.IS_GROUP_ROLE:
+            return isinstance(node, QgsLayerTreeGroup)
+        return None
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
+        index.internalPointer().node.setItemVisibilityChecked(value == Qt.Checked)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsUserCheckable
+
+    def nodes(self) -> List[QgsLayerTreeNode]:
+        """Top level nodes"""
+        return [item.node for item in self._items]
+
+    def toggleChecked(self, index: QModelIndex) -> bool:
+        """Toggles the visibility of the node, returns the new visibility"""
+        isChecked = index.data(Qt.CheckStateRole) != Qt.Checked
+        self.setData(index, Qt.Checked if isChecked else Qt.Unchecked, Qt.CheckStateRole)
+        return isChecked
+
+    def findIndex(self, predicate: Callable[[LayerTreeItem], bool], parent: QModelIndex = QModelIndex()) \
+            -> QModelIndex:
+        """First index (depth first) whose item matches predicate, invalid index if none"""
+        for row in range(self.rowCount(parent)):
+            index = self.index(row, 0, parent)
+            if predicate(index.internalPointer()):
+                return index
+            childIndex = self.findIndex(predicate, index)
+            if childIndex.isValid():
+                return childIndex
+        return QModelIndex()
+
+    def insertNode(self, row: int, node: QgsLayerTreeNode, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        """Adds a row for a node which has been inserted in the qgis layer tree"""
+        siblings = self._children(parent)
+        row = min(row, len(siblings))
+        self.beginInsertRows(parent, row, row)
+        siblings.insert(row, LayerTreeItem(node, parent.internalPointer() if parent.isValid() else None))
+        self.endInsertRows()
+        return self.index(row, 0, parent)
+
+    def removeNode(self, index: QModelIndex) -> None:
+        """Removes the row of a node (the node is not removed from the qgis layer tree)"""
+        self.beginRemoveRows(index.parent(), index.row(), index.row())
+        del self._children(index.parent())[index.row()]
+        self.endRemoveRows()
+
+    def replaceNode(self, index: QModelIndex, node: QgsLayerTreeNode) -> None:
+        """The node of a row has been replaced in the qgis layer tree (e.g. lazy layer created)"""
+        item: LayerTreeItem = index.internalPointer()
+        if item.children:
+            self.beginRemoveRows(index, 0, len(item.children) - 1)
+            item.children = []
+            self.endRemoveRows()
+        item.setNode(node)
+        children = [LayerTreeItem(child, item) for child in node.children()]
+        if children:
+            self.beginInsertRows(index, 0, len(children) - 1)
+            item.children = children
+            self.endInsertRows()
+        self.dataChanged.emit(index, index)
+
+    def moveNode(self, index: QModelIndex, isUp: bool) -> bool:
+        """Moves a node one row up or down among its siblings, in the model and in the qgis layer tree.
+        The node is taken out of its parent and inserted again (clone only in QGIS versions without takeChild), the
+        row is moved with beginMoveRows: the items of the subtree and the expansion state in the view are kept.
+
+        Returns:
+            False if the node is already the first/last one
+        """
+        row = index.row()
+        parent = index.parent()
+        siblings = self._children(parent)
+        targetRow = row - 1 if isUp else row + 1
+        if not 0 <= targetRow < len(siblings):
+            return False
+
+        item: LayerTreeItem = siblings[row]
+        node: QgsLayerTreeNode = item.node
+        neighbour: QgsLayerTreeNode = siblings[targetRow].node
+        qgsParent: QgsLayerTreeGroup = node.parent()
+        if hasattr(qgsParent, 'takeChild'):  # not available in older QGIS versions
+            qgsParent.takeChild(node)
+            qgsParent.insertChildNode(self._childIndex(qgsParent, neighbour) + (0 if isUp else 1), node)
+        else:
+            # the clone is inserted before (up) or after (down) the neighbour, then the node is removed
+            cloneNode = node.clone()
+            neighbourIndex = self._childIndex(qgsParent, neighbour)
+            qgsParent.insertChildNode(neighbourIndex if isUp else neighbourIndex + 1, cloneNode)
+            qgsParent.removeChildNode(node)
+            self._rebind(item, cloneNode)
+
+        # destination row of beginMoveRows is the row before which the item is inserted (before the move)
+        self.beginMoveRows(parent, row, row, parent, targetRow if isUp else targetRow + 1)
+        siblings.insert(targetRow, siblings.pop(row))
+        self.endMoveRows()
+        return True
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _children(self, parent: QModelIndex) -> List[LayerTreeItem]:
+        return parent.internalPointer().children if parent.isValid() else self._items
+
+    def _siblings(self, item: LayerTreeItem) -> List[LayerTreeItem]:
+        return item.parent.children if item.parent is not None else self._items
+
+    @staticmethod
+    def _childIndex(group: QgsLayerTreeGroup, node: QgsLayerTreeNode) -> int:
+        return next(i for i, child in enumerate(group.children()) if child == node)
+
+    def _rebind(self, item: LayerTreeItem, node: QgsLayerTreeNode) -> None:
+        """Points the items of a subtree to the nodes of its clone (same structure)"""
+        item.setNode(node)
+        for childItem, childNode in zip(item.children, node.children()):
+            self._rebind(childItem, childNode)
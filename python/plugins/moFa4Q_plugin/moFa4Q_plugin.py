@@ -19,7 +19,7 @@
 import os
 from functools import partial
 from threading import Timer
-from typing import List, Optional, Union, Dict, Any
+from typing import List, Optional, Union, Dict, Any, Tuple
 
 import yaml
 from PyQt5 import uic
@@ -27,30 +27,42 @@ from PyQt5.QtCore import (QCoreApplication, QFile, QPropertyAnimation,
                           QSize, Qt, QTranslator, qVersion, QRect,
                           QDateTime)
 from PyQt5.QtGui import QColor, QFont, QIcon, QPalette
+from PyQt5.QtXml import QDomDocument
 from PyQt5.QtWidgets import (QAbstractItemView, QApplication, QHBoxLayout,
                              QLabel, QPushButton, QWidget, QMenuBar, QAction)
 from qgis.core import (Qgis, QgsCoordinateReferenceSystem, QgsProject,
-                       QgsRasterLayer, QgsVectorLayer, QgsMapLayer)
-from qgis.core import QgsLayerDefinition, QgsLayerTreeLayer, QgsLayerTreeGroup, QgsLayerTreeNode
+                       QgsRasterLayer, QgsVectorLayer, QgsMapLayer, QgsRectangle,
+                       QgsApplication, QgsCoordinateTransformContext)
+from qgis.core import QgsLayerTreeLayer, QgsLayerTreeGroup, QgsLayerTreeNode
 from qgis.core import QgsLayerTree, QgsMessageLog
 from qgis.gui import QgisInterface
 from qgis.gui import QgsMapCanvas
 
 from .components.btn_tool_map import BtnToolMap
 from .components.custom_list_widget import (CustomQListWidgetItem)
-from .resources import *  # noqa
 from .utils.address_search import AddressSearch
+from .utils.federated_search import FederatedSearch
 from .utils.annotations.annotations import Annotations
+from .utils.gpkg_catalog import GpkgCatalog
 from .utils.gpkg_metadata import GpkgMetadata
 from .utils.gpkg_popup import GpkgPopup
+from .utils.gpkg_scanner import GpkgScanner
 from .utils.gps import Gps
-from .utils.installed_program import OsInstallPath
+from .utils.icon_cache import IconCache
+from .utils.install_path_resolver import InstallPathResolver
 from .utils.layer_trees import LayerTrees
+from .utils.lazy_layers import LazyLayers
 from .utils.measure_tool import MeasureTool
 from .utils.obj_search import ObjSearch
+from .utils.search_source import ObjSearchSource, SearchSource
+from .utils.plugin_resources import PluginResources
 from .utils.print import PrintDialog
+from .utils.proj_conf_writer import ProjConfWriter
+from .utils.private_gpkg_loader import PrivateGpkgLoader
 from .utils.qgis_initalize import QgisInitialize
+from .utils.qlr_loader import QlrLoader, QlrLoadResult
 from .utils.rect_select import RectSelect
+from .utils.startup_profiler import StartupProfiler
 from .utils.tr import tr
 
 
@@ -61,6 +73,9 @@ class MoFa4QPlugin:
     ADDRESS_GEOPACKAGE = "/search/addresses.gpkg"
     GEOSEARCH_GEOPACKAGE = "/search/search_objects.gpkg"
     DEFAULT_PROJECT = "mofa4q.qgz"
+    GPKG_CATALOG = "gpkg_catalog.sqlite"
+    STARTUP_PROFILE_FOLDER = "startup_profiles"
+    INSTALL_PATH_CACHE = "mofa4q_install_path.json"
     BUTTON_SIZE = 100
     PROJECT_CRS = "EPSG:25832"
     TITLE = "MoFa4Q - QGIS [MoFa4Q]"
@@ -82,7 +97,10 @@ class MoFa4QPlugin:
         self.pluginDir = os.path.dirname(__file__)
         self.geopackageDir = os.path.normcase(os.path.join(self.pluginDir, self.LOCAL_FOLDER_GEOPACKAGE))
         self.profile_path = os.path.normcase(self.iface.userProfileManager().userProfile().folder())
-        self.locate_install_path = OsInstallPath.get_locate_programs('mofa4q')
+        self.gpkgCatalog = GpkgCatalog(os.path.join(self.pluginDir, self.GPKG_CATALOG), GpkgMetadata.INFO_VERSION)
+        self.gpkgScanner = GpkgScanner(self.gpkgCatalog)
+        self.locate_install_path = InstallPathResolver(
+            os.path.join(self.profile_path, self.INSTALL_PATH_CACHE)).resolve('mofa4q')
 
         #
         if os.path.exists(self.locate_install_path[1]):
@@ -125,7 +143,7 @@ class MoFa4QPlugin:
         self.lblBgWidget: Optional[QLabel] = None
         self.leftPanel: Optional[QWidget] = None
         self.leftPanelWidth: Optional[float] = None
-        self.addressSearch: Optional[AddressSearch] = None
+        self.addressSearch: Optional[Union[AddressSearch, FederatedSearch]] = None
         self.objSearch: Optional[ObjSearch] = None
         self.gpkgPopup: Optional[GpkgPopup] = None
 
@@ -134,6 +152,11 @@ class MoFa4QPlugin:
         self.gpkgNames: List[str] = []
         self.printDialog: Optional[PrintDialog] = None
         self.rectSelect: Optional[RectSelect] = None
+        self.lazyLayers: Optional[LazyLayers] = None
+        self.startupProfiler = StartupProfiler()
+        self.privateGpkgLoaders: List[PrivateGpkgLoader] = []
+        self.prjConfWriter = ProjConfWriter(os.path.join(self.pluginDir, "prj_conf.yaml"), self._updateProjConf)
+        QgsProject.instance().aboutToBeCleared.connect(self.prjConfWriter.flush)
 
     def initGui(self) -> None:
         """Init plugin."""
@@ -155,6 +178,10 @@ class MoFa4QPlugin:
         print(tr(f"PLUGIN {os.path.basename(__file__)}: unload"))
         # if True == True: # only for text purpouse
         try:
+            # the configuration is built from the layer tree, which is removed below
+            QgsProject.instance().aboutToBeCleared.disconnect(self.prjConfWriter.flush)
+            self.prjConfWriter.close()
+
             self.btnBurger.setParent(None)
             # print('remove btnBurger')
 
@@ -197,8 +224,21 @@ class MoFa4QPlugin:
             if self.rectSelect:
                 self.rectSelect.reset()
 
+            if self.lazyLayers is not None:
+                self.lazyLayers.reset()
+
+            for loader in self.privateGpkgLoaders:
+                loader.batchLoaded.disconnect()
+                loader.cancel()
+            self.privateGpkgLoaders = []
+
             self.annotations.reset()
 
+            self.gpkgCatalog.close()
+
+            IconCache.clear()
+            PluginResources.unregister()
+
         except Exception as e:  # necessary if in debug mode will be deleted one of prev objects
             print('Exception in method unload', e)
 
@@ -207,7 +247,12 @@ class MoFa4QPlugin:
         QgsMessageLog.logMessage(tr(f"PLUGIN {os.path.basename(__file__)}: runProjectReady"), level=Qgis.Info)
         print(f"PLUGIN {os.path.basename(__file__)}: runProjectReady")
 
-        self._readProjConf()
+        self.startupProfiler = StartupProfiler(lambda: len(QgsProject.instance().mapLayers()))
+        with self.startupProfiler.phase('_readProjConf'):
+            self._readProjConf()
+        # the icons are needed from here (buttons, left panel)
+        with self.startupProfiler.phase('PluginResources.register'):
+            PluginResources.register()
 
         isDebug = False
         if "isDebug" in self.prjConfig and self.prjConfig["isDebug"]:
@@ -222,9 +267,12 @@ class MoFa4QPlugin:
         # workaround to change MainWindows Icon and remove * from title
         self._changeQgisMainWindow()
 
-        self._initBgLayer()
-        self._initPrivLayers()
-        self._initPubLayers()
+        with self.startupProfiler.phase('_initBgLayer'):
+            self._initBgLayer()
+        with self.startupProfiler.phase('_initPrivLayers'):
+            self._initPrivLayers()
+        with self.startupProfiler.phase('_initPubLayers'):
+            self._initPubLayers()
 
         self._addBurger()
 
@@ -259,9 +307,14 @@ class MoFa4QPlugin:
 
         self.iface.mapCanvas().renderStarting.connect(self._refreshBtnsPosAndLbl)
 
-        self._initLeftPanel()
+        with self.startupProfiler.phase('_initLeftPanel'):
+            self._initLeftPanel()
+
+        with self.startupProfiler.phase('_initCheckData'):
+            self._initCheckData()
 
-        self._initCheckData()
+        if isDebug or StartupProfiler.isEnabledByEnv():
+            self._reportStartupProfile()
 
         self._showMaptips()
 
@@ -303,6 +356,9 @@ class MoFa4QPlugin:
     def _initPrivLayers(self) -> None:
         """Initialization of all private layers"""
         self.privAllGeopackages = self._getAllGeopackagesInFolder('private')
+        privateLayerOptions: Dict[str, Any] = self.prjConfig.get('privateLayerOptions') or {}
+        if privateLayerOptions.get('lazy'):
+            self.lazyLayers = LazyLayers(self._loadPrivateLayer)
 
         privGpkgs: List[any] = self.prjConfig['privateGpkgs']
         for gpkg in reversed(privGpkgs):
@@ -331,22 +387,18 @@ class MoFa4QPlugin:
 
         root: QgsLayerTree = QgsProject.instance().layerTreeRoot()
         # self.qlrStr = ['group2', 'group3', 'test2']
-        qlrStr: str
-        for qlrStr in self.pubQlrStr:
-            qlrItem: str = os.path.join(self.geopackageDir, "public", qlrStr + '.qlr')
-            isValid: bool = QgsLayerDefinition().loadLayerDefinition(qlrItem, QgsProject.instance(), root)
-            if not isValid:
+        # public layers go to the top of the layer tree in the order of sequence_qlr (annotation layer is not added yet)
+        qlrPaths = [os.path.join(self.geopackageDir, "public", qlrStr + '.qlr') for qlrStr in self.pubQlrStr]
+        self.startupProfiler.count('files', len(qlrPaths))
+        result: QlrLoadResult
+        for result in QlrLoader(QgsProject.instance()).load(qlrPaths, root, 0):
+            qlrName = os.path.basename(result.path)
+            QgsMessageLog.logMessage(f"QLR {qlrName}: parsed in {result.parseTime * 1000:.0f} ms, "
+                                     f"loaded in {result.loadTime * 1000:.0f} ms", level=Qgis.Info)
+            if not result.isValid:
+                QgsMessageLog.logMessage(f"QLR {qlrName}: {result.error}", level=Qgis.Warning)
                 self.iface.messageBar().pushMessage("Warnung",
-                                                    tr(f"QLR-Datei {qlrStr + '.qlr'} nicht gültig"), level=Qgis.Warning)
-
-        # public are added at the bottom of layer tree, code fixes order of the public layers,
-        # they go to the top (annotation layer is not added yet)
-        pubGroups: List[QgsLayerTreeNode] = root.children()[-len(self.pubQlrStr):]
-        # print('pubGroups', pubGroups)
-        for pubGroup in reversed(pubGroups):
-            # print(pubGroup)
-            root.insertChildNode(0, pubGroup.clone())
-            root.removeChildNode(pubGroup)
+                                                    tr(f"QLR-Datei {qlrName} nicht gültig"), level=Qgis.Warning)
 
     def _initLeftPanel(self) -> None:
         self.leftPanel = uic.loadUi(os.path.join(
@@ -377,15 +429,27 @@ class MoFa4QPlugin:
         self.layerTrees.updatePubQlrSignal.connect(self._saveQlrForPubLayers)
         # self.layerTrees.updatePrivQlrSignal.connect(self._saveQlrForPrivLayers)
         self.layerTrees.updateAnnotationSignal.connect(self._updateAnnotationFromLayerTree)
+        if self.lazyLayers is not None:
+            self.lazyLayers.layerCreated.connect(self.layerTrees.replaceLayerNode)
 
         self._initDataSourceLists()
 
         # starts the search initialization
-        self.addressSearch = AddressSearch(self.iface, self.geopackageDir + self.ADDRESS_GEOPACKAGE,
-                                           self.leftPanel.lineEditSearch, self.leftPanel.pushButtonShowAddress)
+        searchConfig = self.prjConfig.get('search') or {}
+        if searchConfig.get('federated'):
+            self.addressSearch = FederatedSearch(self.iface, self._getSearchSources(searchConfig),
+                                                 self.leftPanel.lineEditSearch, self.leftPanel.pushButtonShowAddress,
+                                                 searchConfig,
+                                                 self._getPrivateVectorLayers if searchConfig.get('privateLayers')
+                                                 else None)
+        else:
+            self.addressSearch = AddressSearch(self.iface, self.geopackageDir + self.ADDRESS_GEOPACKAGE,
+                                               self.leftPanel.lineEditSearch, self.leftPanel.pushButtonShowAddress,
+                                               searchConfig)
 
         self.objSearch = ObjSearch(self.iface, self.geopackageDir + self.GEOSEARCH_GEOPACKAGE,
-                                   self.leftPanel.lineEditObjSearch, self.leftPanel.pushButtonShowObjSearch)
+                                   self.leftPanel.lineEditObjSearch, self.leftPanel.pushButtonShowObjSearch,
+                                   searchConfig)
 
         self._addInfo()
 
@@ -446,8 +510,9 @@ class MoFa4QPlugin:
     def _addBurger(self) -> None:
         self.btnBurger = QPushButton()
         self.btnBurger.resize(self.BUTTON_SIZE + 8, self.BUTTON_SIZE + 8)
-        self.btnBurger.setIcon(QIcon(':/plugins/moFa4Q_plugin/icons/burger.png'))
-        self.btnBurger.setIconSize(QSize(self.BUTTON_SIZE, self.BUTTON_SIZE))
+        iconSize = QSize(self.BUTTON_SIZE, self.BUTTON_SIZE)
+        self.btnBurger.setIcon(IconCache.icon(':/plugins/moFa4Q_plugin/icons/burger.png', iconSize))
+        self.btnBurger.setIconSize(iconSize)
         self.btnBurger.setParent(self.iface.mapCanvas())
         self.btnBurger.show()
         self.btnBurger.clicked.connect(self._openLeftPanel)
@@ -480,6 +545,16 @@ class MoFa4QPlugin:
         )
         self.leftPanel.labelInfo.setWordWrap(True)
 
+    def _reportStartupProfile(self) -> None:
+        """Writes the timing report of the startup (JSON) and adds its summary to the info page"""
+        try:
+            path = self.startupProfiler.writeReport(os.path.join(self.pluginDir, self.STARTUP_PROFILE_FOLDER))
+            QgsMessageLog.logMessage(f"Startup profile written to {path}", level=Qgis.Info)
+        except OSError as e:
+            QgsMessageLog.logMessage(f"Startup profile not written: {e}", level=Qgis.Warning)
+        self.leftPanel.labelInfo.setText(self.leftPanel.labelInfo.text() + "\n\n" + tr("Startzeit:") + "\n" +
+                                         self.startupProfiler.summary())
+
     def _addMapButton(self, btnToolMap: BtnToolMap, btnCount: int, maxRowBtn: Optional[int]) -> int:
         """Adds button on the canvas on the right side. It is responsive to the dimension of the screen.
         A second colum of button will be added, if not enough space.
@@ -506,8 +581,9 @@ class MoFa4QPlugin:
         columnNum: int = 2 if maxRowBtn else 1
         btnToolMap.btn.move(width - (columnNum * self.BUTTON_SIZE) - (5 if columnNum > 1 else 0), y)
 
-        btnToolMap.btn.setIcon(QIcon(':/plugins/moFa4Q_plugin/icons/' + btnToolMap.iconPath))
-        btnToolMap.btn.setIconSize(QSize(self.BUTTON_SIZE, self.BUTTON_SIZE))
+        iconSize = QSize(self.BUTTON_SIZE, self.BUTTON_SIZE)
+        btnToolMap.btn.setIcon(IconCache.icon(':/plugins/moFa4Q_plugin/icons/' + btnToolMap.iconPath, iconSize))
+        btnToolMap.btn.setIconSize(iconSize)
         btnToolMap.btn.setParent(self.iface.mapCanvas())
         btnToolMap.btn.setCheckable(btnToolMap.checkable)
         btnToolMap.btn.show()
@@ -532,29 +608,31 @@ class MoFa4QPlugin:
         if 'privateGpkgs' not in self.prjConfig or not self.prjConfig['privateGpkgs']:
             self.prjConfig['privateGpkgs'] = []
 
-    def _writeProjConf(self) -> None:
-        """Writes project configuration file"""
-        with open(os.path.join(self.pluginDir, "prj_conf.yaml"), 'w', encoding='utf8') as outfile:
-            privLayerConfig = []
-            bgLayerConfig = {}
-            childItem: Union[QgsLayerTreeLayer, QgsLayerTreeGroup]
-            for childItem in QgsProject.instance().layerTreeRoot().children():
-                if childItem.name() in self.pubQlrStr:
-                    pass
-                    # pubLayerConfig.append(self._prepareConf(childItem))
-                elif childItem.name() in [name[:-5] for name in self.privAllGeopackages]:
-                    privLayerConfig.append(self._prepareConf(childItem))
-                elif self.bgLayer and childItem.name() == self.bgLayer.name():
-                    bgLayerConfig = {'isVisible': childItem.isVisible()}
-
-                annotationConfig = {'isVisible': self.annotations.isVisible}
-
-            # self.prjConfig['publicGpkgs'] = pubLayerConfig
-            self.prjConfig['privateGpkgs'] = privLayerConfig
-            self.prjConfig['bgGpkg'] = bgLayerConfig
-            self.prjConfig['annotations'] = annotationConfig
-
-            yaml.dump(self.prjConfig, outfile)
+    def _updateProjConf(self) -> Dict[str, Any]:
+        """Updates the project configuration from the layer trees (written by prjConfWriter)
+
+        Returns:
+            the project configuration
+        """
+        privLayerConfig = []
+        bgLayerConfig = {}
+        childItem: Union[QgsLayerTreeLayer, QgsLayerTreeGroup]
+        for childItem in QgsProject.instance().layerTreeRoot().children():
+            if childItem.name() in self.pubQlrStr:
+                pass
+                # pubLayerConfig.append(self._prepareConf(childItem))
+            elif childItem.name() in [name[:-5] for name in self.privAllGeopackages]:
+                privLayerConfig.append(self._prepareConf(childItem))
+            elif self.bgLayer and childItem.name() == self.bgLayer.name():
+                bgLayerConfig = {'isVisible': childItem.isVisible()}
+
+            annotationConfig = {'isVisible': self.annotations.isVisible}
+
+        # self.prjConfig['publicGpkgs'] = pubLayerConfig
+        self.prjConfig['privateGpkgs'] = privLayerConfig
+        self.prjConfig['bgGpkg'] = bgLayerConfig
+        self.prjConfig['annotations'] = annotationConfig
+        return self.prjConfig
 
     def _writeQlrsForPubLayers(self) -> None:
         """Normal update of QLR files due to performance problem is done in QGIS-macro when the project is going to close. # noqa
@@ -600,13 +678,14 @@ class MoFa4QPlugin:
         """
         filename: str = configInfo['layer'] + '.gpkg'
         isVisible: bool = configInfo['isVisible']
-        gpkgMetadata = GpkgMetadata(self.iface, os.path.join(self.geopackageDir, 'private', filename))
-        allLayersInGpkg: List[any] = gpkgMetadata.getInfo()
+        allLayersInGpkg: List[any] = self._getGpkgInfo(os.path.join(self.geopackageDir, 'private', filename))
         currentCount: int = 0
 
         # add layer group to qgis treeRoot
         root: QgsLayerTree = QgsProject.instance().layerTreeRoot()
         groupNode: QgsLayerTreeGroup = root.insertGroup(currentCount, filename[:-5])
+        # set before the layers are added: hidden layers can be created lazily
+        groupNode.setItemVisibilityChecked(isVisible)
 
         # get all tables inside the added geopackage and check if they are vector, raster
         # or something else (e.g. layer styles)
@@ -620,28 +699,113 @@ class MoFa4QPlugin:
             # print(filename, layerInGpkg, groupNode, layerInSettings['isVisible'])
             self._createPrivateLayer(filename, layerInGpkg, groupNode, layerInSettings['isVisible'])
 
-        groupNode.setItemVisibilityChecked(isVisible)
-
     def _createPrivateLayer(self, filename: str, layerInGpkg: any, groupNode: QgsLayerTreeGroup,
                             isVisible: bool) -> None:
+        """Adds a table of a private geopackage to groupNode. In lazy mode hidden layers are added as placeholders,
+        which are replaced by the layer when they become visible (LazyLayers).
+
+        Args:
+            filename: name of the geopackage in the private folder
+            layerInGpkg: metadata of the table
+            groupNode: group of the geopackage in the layer tree
+            isVisible: visibility of the layer
+        """
+        if self.lazyLayers is not None and not (isVisible and groupNode.isVisible()):
+            self.lazyLayers.addPlaceholder(groupNode, filename, layerInGpkg, isVisible)
+            return
+
+        layer: Optional[QgsMapLayer] = self._loadPrivateLayer(filename, layerInGpkg)
+        if layer is not None:
+            QgsProject.instance().addMapLayer(layer, False)
+            currentLayerCount = len(groupNode.children())
+            layerNode = groupNode.insertLayer(currentLayerCount, layer)
+            layerNode.setItemVisibilityChecked(isVisible)
+
+    def _loadPrivateLayer(self, filename: str, layerInGpkg: Dict[str, Any]) -> Optional[QgsMapLayer]:
+        """Opens a table of a private geopackage (see _openPrivateLayer), shows a message if it is not valid
+
+        Args:
+            filename: name of the geopackage in the private folder
+            layerInGpkg: metadata of the table
+
+        Returns:
+            the layer, None if it is not valid
+        """
+        layer = self._openPrivateLayer(filename, layerInGpkg, QgsProject.instance().transformContext())
+        if layer is None:
+            self._showPrivateLayerNotAdded(layerInGpkg)
+        return layer
+
+    def _openPrivateLayer(self, filename: str, layerInGpkg: Dict[str, Any],
+                          transformContext: QgsCoordinateTransformContext) -> Optional[QgsMapLayer]:
+        """Opens a table of a private geopackage. Style and extent are taken from the metadata
+        (GpkgMetadata.getInfo) if available, so the provider does not need to look them up.
+        It does not access the GUI, so it can be called in a QgsTask.
+
+        Args:
+            filename: name of the geopackage in the private folder
+            layerInGpkg: metadata of the table
+            transformContext: transform context of the project
+
+        Returns:
+            the layer, None if it is not valid
+        """
         # print('filename', filename)
-        layer: QgsMapLayer
+        layer: Optional[QgsMapLayer] = None
         if layerInGpkg["data_type"] == "features":  # add vector layer
             path = self.geopackageDir + "/private/" + filename + "|layername=" + layerInGpkg["identifier"]
-            layer = QgsVectorLayer(path, layerInGpkg["identifier"], "ogr")
+            options = QgsVectorLayer.LayerOptions(transformContext)
+            # the metadata contains the default style of layer_styles (None if the table has none): without it the
+            # provider loads the default style (layer_styles or a QML/SLD file next to the geopackage)
+            options.loadDefaultStyle = not layerInGpkg.get("style")
+            options.skipCrsValidation = bool(layerInGpkg.get("crs"))
+            layer = QgsVectorLayer(path, layerInGpkg["identifier"], "ogr", options)
+            if layer.isValid():
+                self._applyGpkgMetadata(layer, layerInGpkg)
         elif layerInGpkg["data_type"] in ["tiles", "2d-gridded-coverage"]:  # add raster layer
             path = "GPKG:" + self.geopackageDir + "/private/" + filename + ":" + layerInGpkg["identifier"]
             layer = QgsRasterLayer(path, layerInGpkg["identifier"], "gdal")
 
-        if layer.isValid():
-            QgsProject.instance().addMapLayer(layer, False)
-            currentLayerCount = len(groupNode.children())
-            layerNode = groupNode.insertLayer(currentLayerCount, layer)
-            layerNode.setItemVisibilityChecked(isVisible)
-        else:
-            self.iface.messageBar().pushMessage("Fehler",
-                                                tr(f"Layer {layerInGpkg['identifier']} konnte nicht hinzugefügt\
-                                                            werden."), level=Qgis.Warning)
+        return layer if layer is not None and layer.isValid() else None
+
+    def _showPrivateLayerNotAdded(self, layerInGpkg: Dict[str, Any]) -> None:
+        self.iface.messageBar().pushMessage("Fehler",
+                                            tr(f"Layer {layerInGpkg['identifier']} konnte nicht hinzugefügt\
+                                                        werden."), level=Qgis.Warning)
+
+    def _applyGpkgMetadata(self, layer: QgsVectorLayer, layerInGpkg: Dict[str, Any]) -> None:
+        """Sets extent and default style of the layer from the metadata of the geopackage"""
+        # the extent of gpkg_contents is optional (NULL) and may be outdated: an empty or degenerate one is not
+        # used, the provider computes the extent then
+        extent = [layerInGpkg.get(key) for key in ("min_x", "min_y", "max_x", "max_y")]
+        if None not in extent and extent[0] < extent[2] and extent[1] < extent[3]:
+            layer.setExtent(QgsRectangle(*extent))
+        if layerInGpkg.get("style"):
+            document = QDomDocument()
+            isApplied, error, _, _ = document.setContent(layerInGpkg["style"], False)
+            if isApplied:
+                isApplied, error = layer.importNamedStyle(document)
+            if not isApplied:
+                QgsMessageLog.logMessage(f"Style of {layer.name()} not applied: {error}", level=Qgis.Warning)
+
+    def _getSearchSources(self, searchConfig: Dict[str, Any]) -> List[SearchSource]:
+        """Sources of the federated search: the existing search geopackages"""
+        sources: List[SearchSource] = []
+        for sourceClass, gpkg in ((SearchSource, self.ADDRESS_GEOPACKAGE),
+                                  (ObjSearchSource, self.GEOSEARCH_GEOPACKAGE)):
+            if os.path.isfile(self.geopackageDir + gpkg):
+                sources.append(sourceClass(self.geopackageDir + gpkg, fuzzy=searchConfig.get('fuzzy', False)))
+        return sources
+
+    def _getPrivateVectorLayers(self) -> List[QgsVectorLayer]:
+        """Vector layers of the private geopackages, searched by the federated search"""
+        privGroups = [name[:-5] for name in self.privAllGeopackages]
+        layers: List[QgsVectorLayer] = []
+        for childItem in QgsProject.instance().layerTreeRoot().children():
+            if type(childItem) == QgsLayerTreeGroup and childItem.name() in privGroups:
+                layers.extend(layerNode.layer() for layerNode in childItem.findLayers()
+                              if isinstance(layerNode.layer(), QgsVectorLayer))
+        return layers
 
     def _removeGroup(self, name: str) -> None:
         """
@@ -743,19 +907,19 @@ class MoFa4QPlugin:
             self.animation.start()
 
     def _getAllGeopackagesInFolder(self, subFolder: str) -> Dict:
-        geopackages = {}
-
-        for fileName in os.listdir(self.geopackageDir + '/' + subFolder):
-            if fileName.endswith(".gpkg"):
-                try:
-                    gpkgMetadata = GpkgMetadata(self.iface, os.path.join(self.geopackageDir, subFolder, fileName))
-                    geopackages[fileName] = gpkgMetadata.getInfo()
-                except Exception:
-                    self.iface.messageBar().pushMessage("Fehler",
-                                                        tr(f"Info-Metadata vom Layer {fileName} ist nicht lesbar."),
-                                                        level=Qgis.Warning)
+        geopackages = self.gpkgScanner.scan(os.path.join(self.geopackageDir, subFolder), self._onGpkgNotReadable)
+        # geopackages answered by the catalog are not opened
+        self.startupProfiler.count('files', self.gpkgScanner.openedCount)
         return geopackages
 
+    def _onGpkgNotReadable(self, fileName: str) -> None:
+        self.iface.messageBar().pushMessage("Fehler", tr(f"Info-Metadata vom Layer {fileName} ist nicht lesbar."),
+                                            level=Qgis.Warning)
+
+    def _getGpkgInfo(self, path: str) -> List[Dict[str, Any]]:
+        """Metadata of the geopackage (GpkgMetadata.getInfo), from the catalog if the file has not been changed"""
+        return self.gpkgCatalog.getInfo(path, lambda gpkgPath: GpkgMetadata(self.iface, gpkgPath).getInfo())
+
     def _initDataSourceLists(self) -> None:
         # print('initDataSourceLists()')
         self.leftPanel.dataSourceList.setSelectionMode(QAbstractItemView.NoSelection)
@@ -844,8 +1008,7 @@ class MoFa4QPlugin:
             fileName: file name
         """
         dirGeopackage: str = os.path.abspath(os.path.join(self.pluginDir, self.LOCAL_FOLDER_GEOPACKAGE, 'private'))
-        gpkgMetadata = GpkgMetadata(self.iface, os.path.join(dirGeopackage, fileName + '.gpkg'))
-        allLayersInGpkg: List[str] = gpkgMetadata.getInfo()
+        allLayersInGpkg: List[str] = self._getGpkgInfo(os.path.join(dirGeopackage, fileName + '.gpkg'))
 
         root: QgsLayerTree = QgsProject.instance().layerTreeRoot()
         # new private layer should be added after all public layers and 1 layer for annotations
@@ -853,10 +1016,15 @@ class MoFa4QPlugin:
         group: QgsLayerTreeGroup = root.insertGroup(pubGroupsCount + 1, fileName)
         allLayersInGpkg.sort(key=lambda x: x['identifier'])
 
-        for layerInGpkg in allLayersInGpkg:
-            self._createPrivateLayer(fileName + '.gpkg', layerInGpkg, group, True)
-
+        # the layers are opened in a background task and added to the (empty) group in batches
         self.layerTrees.addLayerInPrivLayerTree(group)
+        loader = PrivateGpkgLoader(fileName + '.gpkg', allLayersInGpkg,
+                                   partial(self._openPrivateLayerInTask, QgsProject.instance().transformContext()))
+        loader.batchLoaded.connect(partial(self._onPrivateLayersLoaded, fileName))
+        loader.taskCompleted.connect(partial(self._onPrivateGpkgLoaded, loader))
+        loader.taskTerminated.connect(partial(self._onPrivateGpkgLoaded, loader))
+        self.privateGpkgLoaders.append(loader)
+        QgsApplication.taskManager().addTask(loader)
 
         itemN = self._getSavedDataSourceItem(fileName)
         self.leftPanel.dataSourceList.insertItem(0, itemN["item"])
@@ -871,14 +1039,45 @@ class MoFa4QPlugin:
         self.privAllGeopackages = self._getAllGeopackagesInFolder('private')
         self._saveProjConf()
 
+    def _openPrivateLayerInTask(self, transformContext: QgsCoordinateTransformContext, filename: str,
+                                layerInGpkg: Dict[str, Any]) -> Optional[QgsMapLayer]:
+        return self._openPrivateLayer(filename, layerInGpkg, transformContext)
+
+    def _onPrivateLayersLoaded(self, groupName: str, batch: List[Tuple[Dict[str, Any], Optional[QgsMapLayer]]]) \
+            -> None:
+        """Adds a batch of layers opened by PrivateGpkgLoader to the group of the geopackage
+
+        Args:
+            groupName: name of the group/geopackage
+            batch: metadata of the tables and their layers (None if not valid)
+        """
+        group: Optional[QgsLayerTreeGroup] = QgsProject.instance().layerTreeRoot().findGroup(groupName)
+        if group is None:  # the geopackage has been removed while loading
+            return
+        for layerInGpkg, layer in batch:
+            if layer is None:
+                self._showPrivateLayerNotAdded(layerInGpkg)
+                continue
+            QgsProject.instance().addMapLayer(layer, False)
+            layerNode = group.insertLayer(len(group.children()), layer)
+            layerNode.setItemVisibilityChecked(True)
+            self.layerTrees.addLayerToPrivGroup(groupName, layerNode)
+
+    def _onPrivateGpkgLoaded(self, loader: PrivateGpkgLoader) -> None:
+        """ The configuration is saved again with all the layers of the geopackage """
+        if loader in self.privateGpkgLoaders:  # otherwise cancelled by unload
+            self.privateGpkgLoaders.remove(loader)
+            self._saveProjConf()
+
     def _saveProjConf(self) -> None:
         # print('_saveProjConf')
-        self._writeProjConf()
+        self.prjConfWriter.schedule()
         self._onDirtyChanged()
 
-    def _saveQlrForPubLayers(self) -> None:
+    def _saveQlrForPubLayers(self, isSequenceChanged: bool = True) -> None:
         print('_saveQlrForPubLayers')
-        self._writeQlrsForPubLayers()
+        if isSequenceChanged:
+            self._writeQlrsForPubLayers()
         self._onDirtyChanged()
 
     def _importFile(self) -> None:
@@ -952,7 +1151,8 @@ class MoFa4QPlugin:
             # if len(gpkgOlder4Weeks) > 0
             if len(corruptQlrs) > 0:
                 self.gpkgPopup = GpkgPopup(self.iface, self.iface.mainWindow())
-                self.gpkgPopup.show(gpkgOlder4Weeks=gpkgOlder4Weeks, corruptQlrs=corruptQlrs)
+                # the check of the age of the geopackages is disabled (see above)
+                self.gpkgPopup.show(corruptQlrs=corruptQlrs)
 
     def _checkQlrDim0Kb(self) -> List[str]:
         """Checks if one of QLR files in public is empty (0 KB). It meas it is corrupt!
@@ -0,0 +1,85 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# the test runs without QGIS: the package utils is imported from the plugin folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.install_path_resolver import InstallPathResolver  # noqa: E402
+
+
+class FakeRegistry:
+    """Programs of a fake registry (display name, uninstall string), counts how often it is read"""
+
+    def __init__(self, programs):
+        self.programs = programs
+        self.reads = 0
+
+    def __call__(self):
+        self.reads += 1
+        return self.programs
+
+
+class InstallPathResolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cachePath = os.path.join(self.folder, "install_path.json")
+        self.installFolder = os.path.join(self.folder, "MoFa4Q")
+        os.makedirs(self.installFolder)
+        self.registry = FakeRegistry([
+            ("Other Program", os.path.join(self.folder, "Other", "uninstall.exe")),
+            ("MoFa4Q 2.1", '"' + os.path.join(self.installFolder, "uninstall.exe") + '"'),
+            ("MoFa4Q Tools", os.path.join(self.folder, "Tools", "uninstall.exe")),
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def testFirstMatch(self):
+        resolver = InstallPathResolver(self.cachePath, self.registry)
+        self.assertEqual(resolver.resolve("mofa4q"), ["MoFa4Q 2.1", self.installFolder])
+
+    def testNotInstalled(self):
+        resolver = InstallPathResolver(self.cachePath, self.registry)
+        self.assertEqual(resolver.resolve("unknown"), [None, None])
+        self.assertFalse(os.path.exists(self.cachePath))
+
+    def testCachedPath(self):
+        InstallPathResolver(self.cachePath, self.registry).resolve("mofa4q")
+        self.assertEqual(self.registry.reads, 1)
+
+        # a new start reads the cache, not the registry
+        resolver = InstallPathResolver(self.cachePath, self.registry)
+        self.assertEqual(resolver.resolve("mofa4q"), ["MoFa4Q 2.1", self.installFolder])
+        self.assertEqual(self.registry.reads, 1)
+
+    def testCacheInvalidation(self):
+        resolver = InstallPathResolver(self.cachePath, self.registry)
+        resolver.resolve("mofa4q")
+
+        # another searched program
+        self.assertEqual(resolver.resolve("other"), ["Other Program", os.path.join(self.folder, "Other")])
+        self.assertEqual(self.registry.reads, 2)
+
+        # installation folder removed: the registry is read again
+        resolver.resolve("mofa4q")
+        shutil.rmtree(self.installFolder)
+        self.registry.programs = [("MoFa4Q 3.0", os.path.join(self.folder, "MoFa4Q3", "uninstall.exe"))]
+        self.assertEqual(resolver.resolve("mofa4q"), ["MoFa4Q 3.0", os.path.join(self.folder, "MoFa4Q3")])
+        self.assertEqual(self.registry.reads, 4)
+
+    def testCorruptCache(self):
+        with open(self.cachePath, 'w', encoding='utf8') as cacheFile:
+            cacheFile.write("{not json")
+        resolver = InstallPathResolver(self.cachePath, self.registry)
+        self.assertEqual(resolver.resolve("mofa4q"), ["MoFa4Q 2.1", self.installFolder])
+        with open(self.cachePath, 'r', encoding='utf8') as cacheFile:
+            self.assertEqual(json.load(cacheFile)["name"], "MoFa4Q 2.1")
+
+
+if __name__ == '__main__':
+    unittest.main()
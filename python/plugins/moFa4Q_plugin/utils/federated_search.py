@@ -0,0 +1,128 @@
+from typing import Callable, List, Optional, Sequence
+
+from PyQt5.QtCore import QVariant
+from qgis.core import (QgsCoordinateReferenceSystem, QgsCoordinateTransform,
+                       QgsExpression, QgsFeatureRequest, QgsProject,
+                       QgsVectorLayer, QgsVectorLayerFeatureSource)
+
+from .search import DBConnEx, Search
+from .search_engine import FederatedSearchEngine
+from .search_source import SearchResult
+from .tr import tr
+
+
+class LayerSearchSource:
+    """
+    Searches in the text fields of the attribute tables of vector layers (e.g. the private layers).
+    The layers are read through QgsVectorLayerFeatureSource snapshots, which are created in the GUI thread
+    (setLayers) and can be queried in the thread of the search engine.
+    The coordinates of the results are the centroids of the features in TABLE_EPSG.
+    """
+    NAME = "layers"
+    TABLE_EPSG = "EPSG:4326"
+
+    def __init__(self, layers: Sequence[QgsVectorLayer] = ()):
+        self._layers = []
+        self.setLayers(layers)
+
+    def setLayers(self, layers: Sequence[QgsVectorLayer]) -> None:
+        """Takes a snapshot of the layers, has to be called in the GUI thread"""
+        destCrs = QgsCoordinateReferenceSystem(self.TABLE_EPSG)
+        snapshots = []
+        for layer in layers:
+            fields = [field.name() for field in layer.fields() if field.type() == QVariant.String]
+            if not fields:
+                continue
+            transform = QgsCoordinateTransform(layer.crs(), destCrs, QgsProject.instance())
+            snapshots.append((layer.name(), QgsVectorLayerFeatureSource(layer), fields, transform))
+        self._layers = snapshots
+
+    def connect(self) -> None:
+        """The layers need no database connection"""
+        return None
+
+    def query(self, conn: None, pattern: str, limit: int, centers: Optional[dict] = None,
+              isStale: Optional[Callable[[], bool]] = None) -> List[SearchResult]:
+        """Returns max limit features of each layer with a text field containing the pattern
+        (in the order of the layer, centers is not used). The scan stops as soon as isStale returns True,
+        the results found so far are returned (they are not used any more)."""
+        results = []
+        lowerPattern = pattern.lower()
+        value = QgsExpression.quotedValue('%' + pattern + '%')
+        for layerName, featureSource, fields, transform in self._layers:
+            expression = " OR ".join("{} ILIKE {}".format(QgsExpression.quotedColumnRef(field), value)
+                                     for field in fields)
+            request = QgsFeatureRequest().setFilterExpression(expression).setLimit(limit)
+            for feature in featureSource.getFeatures(request):
+                if isStale is not None and isStale():
+                    return results
+                text = next((str(feature[field]) for field in fields
+                             if feature[field] and lowerPattern in str(feature[field]).lower()), None)
+                if text is None:
+                    continue
+                x = y = srid = None
+                geometry = feature.geometry()
+                if geometry and not geometry.isEmpty():
+                    point = transform.transform(geometry.centroid().asPoint())
+                    x, y, srid = point.x(), point.y(), 4326
+                results.append(SearchResult(feature.id(), "{} ({})".format(text, layerName), x, y, srid))
+        return results
+
+    def signature(self) -> tuple:
+        return tuple(layerName for layerName, _, _, _ in self._layers)
+
+
+class FederatedSearch(Search):
+    """
+    One search box for several sources: the search geopackages (SearchSource) and optionally the attribute
+    tables of layers (e.g. the private layers). The sources are queried concurrently by FederatedSearchEngine,
+    the results are merged and ranked (exact > prefix > substring, matching house numbers first).
+    """
+
+    def __init__(self, iface, sources, lineEditSearch, pushButtonShow, config=None,
+                 getLayersFn: Optional[Callable[[], List[QgsVectorLayer]]] = None):
+        self.engine = None
+        self.layerSource = None
+        self.getLayersFn = getLayersFn
+        super().__init__(iface, sources, lineEditSearch, pushButtonShow, config)
+
+    def initSource(self, sources):
+        sources = list(sources)
+        if self.getLayersFn is not None:
+            self.layerSource = LayerSearchSource(self.getLayersFn())
+            sources.append(self.layerSource)
+            QgsProject.instance().layersAdded.connect(self.updateLayers)
+            QgsProject.instance().layersRemoved.connect(self.updateLayers)
+        if not sources:
+            raise DBConnEx(tr("Keine Quelle für die Suche gefunden."))
+        self.engine = FederatedSearchEngine(sources)
+
+    def updateLayers(self, *args):
+        """ Layers have been added or removed in the project: the cached results are outdated """
+        self.layerSource.setLayers(self.getLayersFn())
+
+    def createWorkerConn(self):
+        """ The engine opens the connections of the sources in its own threads """
+        return None
+
+    def getSignature(self):
+        return tuple(source.signature() for source in self.engine.sources)
+
+    def queryResults(self, conn, pattern):
+        return self.engine.search(pattern, self.MAX_RESULTS + 1, self.worker.isStale, self.centers)
+
+    def queryGeom(self, text):
+        """ Coordinates of the text in the first source which has it """
+        return self.engine.queryGeom(text)
+
+    def getSrsIds(self):
+        return {getattr(source, 'srsId', None) for source in self.engine.sources} - {None}
+
+    def resetAll(self):
+        """ Closes the connections of all sources - It used when plugin is unloaded """
+        if self.layerSource is not None:
+            QgsProject.instance().layersAdded.disconnect(self.updateLayers)
+            QgsProject.instance().layersRemoved.disconnect(self.updateLayers)
+        super().resetAll()
+        if self.engine is not None:
+            self.engine.close()
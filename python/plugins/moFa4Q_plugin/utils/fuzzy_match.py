@@ -0,0 +1,72 @@
+import re
+import unicodedata
+from typing import Optional, Set
+
+
+class FuzzyMatch:
+    """Normalization and bounded edit distance for the typo tolerant search.
+
+    The texts are normalized the same way in the index and in the query: lower case, ß -> ss,
+    ä/ö/ü -> ae/oe/ue, other accents removed, punctuation replaced by a space.
+    The edit distance is the smallest Levenshtein distance between the pattern and any substring of the text
+    (bit-parallel algorithm of Myers).
+    """
+
+    REPLACEMENTS = str.maketrans({"ß": "ss", "ä": "ae", "ö": "oe", "ü": "ue"})
+    PUNCTUATION_REGEX = re.compile(r"[^\w\s]+")
+    SPACE_REGEX = re.compile(r"\s+")
+
+    @staticmethod
+    def normalize(text: Optional[str]) -> Optional[str]:
+        if text is None:
+            return None
+        text = text.lower().translate(FuzzyMatch.REPLACEMENTS)
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+        text = FuzzyMatch.PUNCTUATION_REGEX.sub(" ", text)
+        return FuzzyMatch.SPACE_REGEX.sub(" ", text).strip()
+
+    @staticmethod
+    def maxDistance(pattern: str) -> int:
+        """Number of typos tolerated for the (normalized) pattern"""
+        if len(pattern) < 4:
+            return 0
+        if len(pattern) < 8:
+            return 1
+        return 2
+
+    @staticmethod
+    def trigrams(text: str) -> Set[str]:
+        """Trigrams as created by the FTS5 trigram tokenizer"""
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @staticmethod
+    def substringDistance(pattern: str, text: str) -> int:
+        """Smallest edit distance between pattern and any substring of text"""
+        m = len(pattern)
+        if m == 0:
+            return 0
+        peq = {}
+        for i, c in enumerate(pattern):
+            peq[c] = peq.get(c, 0) | (1 << i)
+        mask = (1 << m) - 1
+        high = 1 << (m - 1)
+        pv, mv = mask, 0
+        score = best = m
+        for c in text:
+            eq = peq.get(c, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | (~(xh | pv) & mask)
+            mh = pv & xh
+            if ph & high:
+                score += 1
+            elif mh & high:
+                score -= 1
+            # no carry in: a match may start at every position of the text
+            ph = (ph << 1) & mask
+            mh = (mh << 1) & mask
+            pv = mh | (~(xv | ph) & mask)
+            mv = ph & xv
+            if score < best:
+                best = score
+        return best
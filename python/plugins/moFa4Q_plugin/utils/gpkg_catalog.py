@@ -0,0 +1,96 @@
+import json
+import os
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class GpkgCatalog:
+    """
+    Persistent cache of the geopackage metadata (result of GpkgMetadata.getInfo), so that geopackages which have
+    not been changed since the last start are not opened again. An entry is valid as long as size and
+    modification time of the geopackage are the same.
+    The catalog is a small SQLite file (e.g. next to prj_conf.yaml); if it is not readable, it is created again.
+    If the version of the stored metadata (PRAGMA user_version) is not version, all entries are removed.
+    """
+
+    TABLE = "gpkg_catalog"
+    STR_CREATE = (f"CREATE TABLE IF NOT EXISTS {TABLE} "
+                  "(path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime INTEGER NOT NULL, info TEXT NOT NULL)")
+    STR_SELECT = f"SELECT size, mtime, info FROM {TABLE} WHERE path = ?"
+    STR_INSERT = f"INSERT OR REPLACE INTO {TABLE} (path, size, mtime, info) VALUES (?, ?, ?, ?)"
+    STR_DELETE = f"DELETE FROM {TABLE} WHERE path = ?"
+
+    def __init__(self, cachePath: str, version: int = 0):
+        self.cachePath = cachePath
+        self.version = version
+        self.conn: Optional[sqlite3.Connection] = None
+        try:
+            self._open(cachePath)
+        except sqlite3.DatabaseError:
+            self.close()
+            try:
+                # corrupt cache file: it contains only data, which can be read again from the geopackages
+                os.remove(cachePath)
+                self._open(cachePath)
+            except (OSError, sqlite3.Error):
+                # folder not writable: the catalog is used only in this session
+                self.close()
+                self._open(":memory:")
+
+    @staticmethod
+    def signature(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def lookup(self, path: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached metadata of the geopackage, None if it is unknown or it has been changed"""
+        row = self.conn.execute(self.STR_SELECT, [self.key(path)]).fetchone()
+        if row is None:
+            return None
+        try:
+            if (row[0], row[1]) != self.signature(path):
+                return None
+        except OSError:
+            return None
+        return json.loads(row[2])
+
+    def store(self, path: str, info: List[Dict[str, Any]]) -> None:
+        size, mtime = self.signature(path)
+        with self.conn:
+            self.conn.execute(self.STR_INSERT, [self.key(path), size, mtime, json.dumps(info)])
+
+    def remove(self, path: str) -> None:
+        with self.conn:
+            self.conn.execute(self.STR_DELETE, [self.key(path)])
+
+    def getInfo(self, path: str, readFn: Callable[[str], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Metadata of the geopackage from the catalog. If it is missing or outdated, it is read with readFn
+        and stored (empty results are not stored: the geopackage could not be read)
+        """
+        info = self.lookup(path)
+        if info is None:
+            info = readFn(path)
+            if info:
+                try:
+                    self.store(path, info)
+                except (OSError, sqlite3.Error):
+                    pass  # the catalog is only a cache
+        return info
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _open(self, path: str) -> None:
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(self.STR_CREATE)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != self.version:
+            with self.conn:
+                self.conn.execute(f"DELETE FROM {self.TABLE}")
+            self.conn.execute(f"PRAGMA user_version = {int(self.version)}")
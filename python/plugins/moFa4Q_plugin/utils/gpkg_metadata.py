@@ -1,4 +1,5 @@
 import os.path
+import pathlib
 import sqlite3
 
 from qgis.core import Qgis
@@ -13,7 +14,15 @@ class GpkgMetadata():
     raster data, single layer or few layers
     """
 
-    STR_TABLE = 'SELECT table_name, data_type, identifier FROM gpkg_contents'
+    # version of the structure returned by getInfo, entries of the GpkgCatalog with another version are read again
+    INFO_VERSION = 3
+    STR_TABLE_FULL = ('SELECT c.table_name, c.data_type, c.identifier, c.min_x, c.min_y, c.max_x, c.max_y, '
+                      "s.organization || ':' || s.organization_coordsys_id "
+                      'FROM gpkg_contents c LEFT JOIN gpkg_spatial_ref_sys s ON s.srs_id = c.srs_id')
+    STR_EXISTING_TABLES = "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')"
+    # ordered by time: the newest default style of a table wins
+    STR_DEFAULT_STYLES = ('SELECT f_table_name, styleQML FROM layer_styles WHERE useAsDefault '
+                          'ORDER BY update_time')
 
     def __init__(self, iface: QgisInterface, filePath: str):
         self.iface = iface
@@ -30,12 +39,22 @@ class GpkgMetadata():
         if not self.c:
             return []
 
-        cursor = self.c.execute(self.STR_TABLE)
-        infoArray = []
-        for sqlRow in cursor:
-            infoArray.append({'table_name': sqlRow[0], 'data_type': sqlRow[1], 'identifier': sqlRow[2]})
-        self.conn.close()
-        return infoArray
+        try:
+            return self._readInfo(self.conn)
+        finally:
+            self.conn.close()
+
+    @staticmethod
+    def readInfo(filePath: str):
+        """Same as getInfo, but without GUI messages (errors are raised), so it can be called in any thread.
+        The geopackage is opened read-only (not immutable: the synctool may replace it while QGIS is running).
+        """
+        uri = pathlib.Path(os.path.abspath(filePath)).as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True)
+        try:
+            return GpkgMetadata._readInfo(conn)
+        finally:
+            conn.close()
 
     def createDBConn(self, path: str):
         try:
@@ -44,3 +63,29 @@ class GpkgMetadata():
         except sqlite3.Error:
             self.iface.messageBar().pushMessage(tr("Fehler"), tr(
                 f"File {path} gefunden aber die Datei kann nicht geöffnet werden"), level=Qgis.Warning)
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _readInfo(conn: sqlite3.Connection):
+        """Contents of the geopackage with the extent, the CRS (authority:code) and the default style (QML of
+        layer_styles) of each table: the private layers take extent and style from it instead of querying the
+        provider, with a CRS the CRS validation is skipped. layer_styles is only read if it exists.
+        """
+        tables = {row[0] for row in conn.execute(GpkgMetadata.STR_EXISTING_TABLES)}
+        styles = dict(conn.execute(GpkgMetadata.STR_DEFAULT_STYLES)) if 'layer_styles' in tables else {}
+
+        infoArray = []
+        for sqlRow in conn.execute(GpkgMetadata.STR_TABLE_FULL).fetchall():
+            tableName = sqlRow[0]
+            infoArray.append({
+                'table_name': tableName,
+                'data_type': sqlRow[1],
+                'identifier': sqlRow[2],
+                'min_x': sqlRow[3],
+                'min_y': sqlRow[4],
+                'max_x': sqlRow[5],
+                'max_y': sqlRow[6],
+                'crs': sqlRow[7],
+                'style': styles.get(tableName),
+            })
+        return infoArray
@@ -0,0 +1,76 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+from .gpkg_catalog import GpkgCatalog
+from .gpkg_metadata import GpkgMetadata
+
+
+class GpkgScanner:
+    """
+    Reads the metadata of all geopackages of a folder (same structure as GpkgMetadata.getInfo).
+    Geopackages known by the catalog are not opened, the other ones are read concurrently in a thread pool
+    with read-only connections (GpkgMetadata.readInfo). scan blocks until all geopackages are read (no progress
+    can be shown meanwhile), unchanged geopackages cost only a lookup in the catalog. The catalog is only used in
+    the GUI thread.
+    """
+
+    MAX_WORKERS = 8
+
+    def __init__(self, catalog: GpkgCatalog, readFn: Callable[[str], List[Dict[str, Any]]] = GpkgMetadata.readInfo):
+        self.catalog = catalog
+        self.readFn = readFn
+        # number of geopackages opened by the last scan (not found in the catalog)
+        self.openedCount = 0
+
+    def scan(self, folder: str, onError: Optional[Callable[[str], None]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Metadata of the geopackages in folder by file name. Geopackages which can not be read are not returned,
+        onError is called with their file name
+
+        Args:
+            folder: folder with the geopackages
+            onError: called for each geopackage which can not be read
+
+        Returns:
+            dict file name -> list of the contents of the geopackage
+        """
+        fileNames = sorted(fileName for fileName in os.listdir(folder) if fileName.endswith(".gpkg"))
+        geopackages = {}
+        missing = []
+        for fileName in fileNames:
+            info = self._lookup(os.path.join(folder, fileName))
+            if info is None:
+                missing.append(fileName)
+            else:
+                geopackages[fileName] = info
+        self.openedCount = len(missing)
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, os.cpu_count() or 1, len(missing))) as pool:
+                futures = {pool.submit(self.readFn, os.path.join(folder, fileName)): fileName for fileName in missing}
+                for future in as_completed(futures):
+                    fileName = futures[future]
+                    try:
+                        info = future.result()
+                        geopackages[fileName] = info
+                        self._store(os.path.join(folder, fileName), info)
+                    except Exception:
+                        if onError is not None:
+                            onError(fileName)
+
+        # results arrive in any order: sorted by file name
+        return {fileName: geopackages[fileName] for fileName in fileNames if fileName in geopackages}
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _lookup(self, path: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            return self.catalog.lookup(path)
+        except Exception:
+            return None
+
+    def _store(self, path: str, info: List[Dict[str, Any]]) -> None:
+        if not info:
+            return
+        try:
+            self.catalog.store(path, info)
+        except Exception:
+            pass  # the catalog is only a cache
@@ -0,0 +1,69 @@
+import os
+from typing import Dict, Optional, Tuple
+
+from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtGui import QGuiApplication, QIcon, QPixmap
+
+
+class IconCache:
+    """
+    Shared cache of the icons of the plugin, scaled once to the size they are shown with.
+    A pixmap is keyed by path, size and device pixel ratio (DPI of the screen): it is read from disk (or from the
+    Qt resources) and scaled only at the first use, building or refreshing the layer trees and the map buttons
+    reuses it. The path is a Qt resource path (':/plugins/...') or a file name in the folder icons of the plugin.
+    """
+
+    ICON_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'icons')
+
+    _pixmaps: Dict[Tuple[str, int, int, float], QPixmap] = {}
+    _icons: Dict[Tuple[str, int, int, float], QIcon] = {}
+
+    @classmethod
+    def pixmap(cls, path: str, size: QSize, devicePixelRatio: Optional[float] = None) -> QPixmap:
+        """Pixmap of path scaled to size (keeping the aspect ratio) for the given device pixel ratio
+
+        Args:
+            path: Qt resource path or file name in the folder icons
+            size: size of the pixmap in device independent pixels
+            devicePixelRatio: ratio of the screen, the ratio of the application if None
+
+        Returns:
+            the cached pixmap, a null pixmap if the file does not exist
+        """
+        ratio = devicePixelRatio if devicePixelRatio is not None else cls._devicePixelRatio()
+        key = (path, size.width(), size.height(), ratio)
+        pixmap = cls._pixmaps.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(cls._resolve(path))
+            if not pixmap.isNull():
+                pixmap = pixmap.scaled(size * ratio, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                pixmap.setDevicePixelRatio(ratio)
+            cls._pixmaps[key] = pixmap
+        return pixmap
+
+    @classmethod
+    def icon(cls, path: str, size: QSize, devicePixelRatio: Optional[float] = None) -> QIcon:
+        """Icon with the pixmap of path scaled to size, see pixmap"""
+        ratio = devicePixelRatio if devicePixelRatio is not None else cls._devicePixelRatio()
+        key = (path, size.width(), size.height(), ratio)
+        icon = cls._icons.get(key)
+        if icon is None:
+            icon = QIcon(cls.pixmap(path, size, ratio))
+            cls._icons[key] = icon
+        return icon
+
+    @classmethod
+    def clear(cls) -> None:
+        """Releases all pixmaps and icons (e.g. at unload of the plugin)"""
+        cls._pixmaps.clear()
+        cls._icons.clear()
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @classmethod
+    def _resolve(cls, path: str) -> str:
+        return path if path.startswith(':') or os.path.isabs(path) else os.path.join(cls.ICON_DIR, path)
+
+    @staticmethod
+    def _devicePixelRatio() -> float:
+        app = QGuiApplication.instance()
+        return app.devicePixelRatio() if app is not None else 1.0
@@ -0,0 +1,62 @@
+import json
+import os
+import re
+from typing import Callable, List, Optional, Sequence, Tuple
+
+
+def registryPrograms() -> List[Tuple[str, str]]:
+    """Installed programs from the Windows registry (display name, uninstall string)"""
+    from .installed_program import OsInstallPath  # winreg is only available on Windows
+    return [(program[0], program[1]) for program in OsInstallPath.list_programs()]
+
+
+class InstallPathResolver:
+    """
+    Finds the installation folder of a program like OsInstallPath.get_locate_programs, but the result is cached in
+    a small JSON file (e.g. in the QGIS profile): the registry is only enumerated if the cache is missing, belongs to
+    another program or is stale (the installation folder does not exist anymore).
+    The programs are read by listProgramsFn, a callable returning (display name, uninstall string) pairs
+    (default: the Windows registry), which is replaced by a fake registry in test/test_install_path_resolver.py.
+    """
+
+    def __init__(self, cachePath: str, listProgramsFn: Callable[[], Sequence[Tuple[str, str]]] = registryPrograms):
+        self.cachePath = cachePath
+        self.listProgramsFn = listProgramsFn
+
+    def resolve(self, searchProgram: str) -> List[Optional[str]]:
+        """Name and installation folder of the first program whose name contains searchProgram
+
+        Args:
+            searchProgram: regular expression, compared with the name of the program in lower case
+
+        Returns:
+            [name, folder] as OsInstallPath.get_locate_programs, [None, None] if the program is not installed
+        """
+        cached = self._readCache(searchProgram)
+        if cached is not None:
+            return cached
+
+        for name, uninstallString in self.listProgramsFn():
+            if re.search(searchProgram, name.lower()):
+                self._writeCache(searchProgram, name, uninstallString)
+                return [name, os.path.dirname(uninstallString).replace('"', '')]
+        return [None, None]
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _readCache(self, searchProgram: str) -> Optional[List[Optional[str]]]:
+        try:
+            with open(self.cachePath, 'r', encoding='utf8') as cacheFile:
+                cache = json.load(cacheFile)
+            folder = os.path.dirname(cache['uninstallString']).replace('"', '')
+            if cache['search'] != searchProgram or not os.path.isdir(folder):
+                return None
+            return [cache['name'], folder]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def _writeCache(self, searchProgram: str, name: str, uninstallString: str) -> None:
+        try:
+            with open(self.cachePath, 'w', encoding='utf8') as cacheFile:
+                json.dump({'search': searchProgram, 'name': name, 'uninstallString': uninstallString}, cacheFile)
+        except OSError:
+            pass  # the cache is optional
@@ -39,6 +39,11 @@ class OsInstallPath:
         z = OsInstallPath._list_installed_programs(win32con.HKEY_CURRENT_USER, 0)
         return [x + y + z]
 
+    @staticmethod
+    def list_programs() -> list:
+        """Display name and uninstall string of all installed programs"""
+        return [program for programs in OsInstallPath._get_all_list_programs() for program in programs]
+
     @staticmethod
     def get_locate_programs(search_program: str) -> list[str]:
         if isinstance(search_program, str):
@@ -1,30 +1,25 @@
 import os
-from enum import Enum
 from functools import partial
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import List, Union
 
-from PyQt5.QtCore import QSize, Qt, pyqtSignal, QObject
-from PyQt5.QtGui import QIcon, QFont, QPixmap
-from PyQt5.QtWidgets import QWidget, QHBoxLayout, QPushButton, QLabel, QTreeWidget, QAbstractItemView
+from PyQt5.QtCore import QModelIndex, QSize, Qt, pyqtSignal, QObject
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QPushButton, QLabel, QTreeView, QAbstractItemView
 from qgis.core import QgsProject, QgsLayerTree, QgsLayerTreeGroup, QgsLayerTreeLayer, Qgis, QgsVectorLayer
-from qgis.core import QgsRasterLayer
+from qgis.core import QgsLayerTreeNode, QgsRasterLayer
 from qgis.gui import QgisInterface
 
-from ..components.custom_list_widget import (CustomQTreeWidgetItem)
+from ..components.layer_tree_delegate import LayerTreeDelegate
+from ..components.layer_tree_model import LayerTreeModel
+from .icon_cache import IconCache
 from .tr import tr
 
 
-class LayerTreeType(Enum):
-    """Three type of layers (public, private and background layers)"""
-
-    BG = 1
-    PUBLIC = 2
-    PRIVATE = 3
-
-
 class LayerTrees(QObject):
-    """Defines the 3 layer trees for public, private and background layers"""
+    """Defines the 3 layer trees for public, private and background layers
+    The public and private layer trees are views of a LayerTreeModel, their rows are painted by LayerTreeDelegate.
+    """
 
     LABEL_FONT = QFont('MS Shell Dlg 2', 10)
     LABEL_FONT_2 = QFont('MS Shell Dlg 2', 11)
@@ -66,13 +61,11 @@ class LayerTrees(QObject):
         font-family: MS Shell Dlg 2;
         font-size: 11pt;
     }"""
-    ICON_WIDTH = 25
-    ICON_HEIGHT = 25
-    MOVE_BTN_WIDTH = 30
     BTN_CHECK_WIDTH = 50
+    BTN_CHECK_ICON_SIZE = QSize(BTN_CHECK_WIDTH - 10, 40)
 
     updateYamlSignal = pyqtSignal()
-    updatePubQlrSignal = pyqtSignal()
+    updatePubQlrSignal = pyqtSignal(bool)  # True if the order of the public groups (sequence_qlr.yml) changed
     # updatePrivQlrSignal = pyqtSignal()
     updateAnnotationSignal = pyqtSignal(bool, bool)
 
@@ -90,26 +83,36 @@ class LayerTrees(QObject):
         self.internWidth = 0
 
         self.existingGroups: List[str] = []
+        self.pubModel: LayerTreeModel = None
+        self.privModel: LayerTreeModel = None
 
         self._initStyle()
         self._initLayerTrees()
 
-    def addLayerInPrivLayerTree(self, groupNode: str) -> None:
+    def addLayerInPrivLayerTree(self, groupNode: QgsLayerTreeGroup) -> None:
         """
         Adds layer/gpkg (available under the folder geopackageDir in private layer tree)
 
         Args:
-            groupNode: name of the groupNode/file/gpkg
+            groupNode: groupNode of the file/gpkg
         """
-        self.leftPanel.privLayerTree: QTreeWidget
-        # self.leftPanel.privLayerTree.clear()
-        treeWidgetItem = self._getLayerItem(groupNode, True,
-                                            self.leftPanel.privLayerTree, LayerTreeType.PRIVATE)
-        self.leftPanel.privLayerTree.insertTopLevelItem(0, treeWidgetItem["item"])
-        self.leftPanel.privLayerTree.setItemWidget(treeWidgetItem["item"], 0, treeWidgetItem["widget"])
-        self._addChildren(groupNode, treeWidgetItem["item"], self.leftPanel.privLayerTree, False,
-                          LayerTreeType.PRIVATE)
+        self._registerNode(groupNode)
+        self.privModel.insertNode(0, groupNode)
 
+    def addLayerToPrivGroup(self, groupName: str, layerNode: QgsLayerTreeLayer) -> None:
+        """
+        Appends a layer to the item of a layer/gpkg in private layer tree (layers loaded in background)
+
+        Args:
+            groupName: name of the groupNode/file/gpkg
+            layerNode: node of the layer in the qgis layer tree
+        """
+        for row in range(self.privModel.rowCount()):
+            index = self.privModel.index(row, 0)
+            if index.internalPointer().id == groupName:
+                self._registerNode(layerNode)
+                self.privModel.insertNode(self.privModel.rowCount(index), layerNode, index)
+                break
 
     def removeLayerInPrivLayerTree(self, fileName: str):
         """
@@ -120,37 +123,50 @@ class LayerTrees(QObject):
             fileName: name of the file/gpkg
         """
         root: QgsLayerTree = QgsProject.instance().layerTreeRoot()
-        # print('fileName:', fileName)
-        # print('notSavedDataSourceList:', self.leftPanel.notSavedDataSourceList)
-        for i in range(self.leftPanel.privLayerTree.topLevelItemCount()):
-            item: CustomQTreeWidgetItem = self.leftPanel.privLayerTree.topLevelItem(i)
-            if item.id == fileName:
-                for j in range(item.childCount()):
-                    layerId: str = item.child(j).id
+        for row in range(self.privModel.rowCount()):
+            index = self.privModel.index(row, 0)
+            if index.internalPointer().id == fileName:
+                groupNode: QgsLayerTreeGroup = index.data(LayerTreeModel.NODE_ROLE)
+                layerIds: List[str] = [child.layerId() for child in groupNode.findLayers()]
+                for layerId in layerIds:
                     layer: QgsVectorLayer = QgsProject.instance().mapLayer(layerId)
-                    # print('remove as layer', layerId, layer)
-                    QgsProject.instance().removeMapLayer(layer)
-                self.leftPanel.privLayerTree.takeTopLevelItem(i)
-                groupNode: QgsLayerTreeGroup = root.findGroup(fileName)
+                    if layer is not None:  # None for placeholders of lazy layers
+                        QgsProject.instance().removeMapLayer(layer)
+                self.privModel.removeNode(index)
                 root.removeChildNode(groupNode)
 
                 if fileName in self.existingGroups:
                     self.existingGroups.remove(fileName)
                 break
 
+    def replaceLayerNode(self, oldLayerId: str, layerNode: QgsLayerTreeLayer) -> None:
+        """
+        Replaces the item of a layer in private layer tree, e.g. when a lazy layer has been created
+
+        Args:
+            oldLayerId: layer id of the replaced item
+            layerNode: new node of the layer in the qgis layer tree
+        """
+        index = self.privModel.findIndex(lambda item: item.parent is not None and item.id == oldLayerId)
+        if index.isValid():
+            self.privModel.replaceNode(index, layerNode)
+
     # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
     def _initStyle(self):
         iconClosed = Path(os.path.join(os.path.dirname(__file__), '../icons', 'branch_closed.png')).as_posix()
         iconOpen = Path(os.path.join(os.path.dirname(__file__), '../icons', 'branch_open.png')).as_posix()
         self.treeStyleSheet = self.LAYERTREE_STYLE % {"iconClosed": iconClosed, "iconOpen": iconOpen}
 
-        self.leftPanel.pubLayerTree.setSelectionMode(QAbstractItemView.NoSelection)
-        self.leftPanel.pubLayerTree.header().setMinimumSectionSize(self.leftPanel.pubLayerTree.width())
-        self.leftPanel.pubLayerTree.setStyleSheet(self.treeStyleSheet)
-
-        self.leftPanel.privLayerTree.setSelectionMode(QAbstractItemView.NoSelection)
-        self.leftPanel.privLayerTree.header().setMinimumSectionSize(self.leftPanel.privLayerTree.width())
-        self.leftPanel.privLayerTree.setStyleSheet(self.treeStyleSheet)
+        self.delegate = LayerTreeDelegate(self.LABEL_FONT, self)
+        self.delegate.checkClicked.connect(self._onCheckClicked)
+        self.delegate.moveClicked.connect(self._onMoveClicked)
+        layerTree: QTreeView
+        for layerTree in (self.leftPanel.pubLayerTree, self.leftPanel.privLayerTree):
+            layerTree.setSelectionMode(QAbstractItemView.NoSelection)
+            layerTree.setHeaderHidden(True)
+            layerTree.setUniformRowHeights(True)
+            layerTree.setItemDelegate(self.delegate)
+            layerTree.setStyleSheet(self.treeStyleSheet)
 
         self.leftPanel.toolBox2.setStyleSheet(self.TOOL_BOX_STYLE2)
 
@@ -186,70 +202,42 @@ class LayerTrees(QObject):
         self.leftPanel.bgLayerTree.setLayout(hLayout)
 
     def _createPubLayersInLayerTree(self, root: QgsLayerTree):
-        """Creates items for public layers in layer tree
+        """Creates the model of public layers in layer tree
 
         Args:
             root: root item in layer tree
         """
-        # pubGkpgs: Optional[List[any]] = None
-        # if self.prjConfig is not None and 'publicGpkgs' in self.prjConfig:
-        #     pubGkpgs = self.prjConfig['publicGpkgs']
-
-        self.leftPanel.layerTree: QTreeWidget
-        childItem: Union[QgsLayerTreeLayer, QgsLayerTreeGroup]
-        # isVisible: bool
-        for childItem in root.children():
-            if childItem.name() in self.pubQlrStr:
-                # print('childItem', childItem, childItem.name(), childItem.dump())
-                # configItem, isVisible = self._getVisibilityBasedOnConfig(childItem, pubGkpgs)
-                treeWidgetItem = self._getLayerItem(childItem, childItem.itemVisibilityChecked(),
-                                                    self.leftPanel.pubLayerTree, LayerTreeType.PUBLIC)
-                currentCount: int = self.leftPanel.pubLayerTree.topLevelItemCount()
-                self.leftPanel.pubLayerTree.insertTopLevelItem(currentCount, treeWidgetItem["item"])
-                self.leftPanel.pubLayerTree.setItemWidget(treeWidgetItem["item"], 0, treeWidgetItem["widget"])
-                self._addChildren(childItem, treeWidgetItem["item"], self.leftPanel.pubLayerTree, False,
-                                  LayerTreeType.PUBLIC)
+        nodes: List[QgsLayerTreeNode] = [child for child in root.children() if child.name() in self.pubQlrStr]
+        for node in nodes:
+            self._registerNode(node)
+        self.pubModel = LayerTreeModel(nodes)
+        self.leftPanel.pubLayerTree.setModel(self.pubModel)
 
     def _createPrivLayersInLayerTree(self, root: QgsLayerTree):
-        """Creates items for private layers in layer tree
+        """Creates the model of private layers in layer tree
 
         Args:
             root: root item in layer tree
         """
         privGkpgs: List[any] = self.prjConfig['privateGpkgs']
         privGkpgNamesInRoot = [pG['layer'] for pG in privGkpgs]
-        # print('==> privGkpgs', rootGkpgName)
-        self.leftPanel.layerTree: QTreeWidget
-        childItem: Union[QgsLayerTreeLayer, QgsLayerTreeGroup]
-        for childItem in root.children():
-            if childItem.name() in privGkpgNamesInRoot:
-                # print(childItem.name(), childItem.isVisible())
-                treeWidgetItem = self._getLayerItem(childItem, childItem.itemVisibilityChecked(),
-                                                    self.leftPanel.privLayerTree, LayerTreeType.PRIVATE)
-                currentCount: int = self.leftPanel.privLayerTree.topLevelItemCount()
-                self.leftPanel.privLayerTree.insertTopLevelItem(currentCount, treeWidgetItem["item"])
-                self.leftPanel.privLayerTree.setItemWidget(treeWidgetItem["item"], 0, treeWidgetItem["widget"])
-                self._addChildren(childItem, treeWidgetItem["item"], self.leftPanel.privLayerTree,
-                                  False, LayerTreeType.PRIVATE)
-
-    def _addChildren(self, father: QgsLayerTreeLayer, item: CustomQTreeWidgetItem, layerTree: QTreeWidget,
-                     isMoved: bool, layerTreeType: LayerTreeType) -> None:
-        # print('father', father)
-        for childItem in reversed(father.children()):
-            # print('childItem', childItem, type(childItem))
-            # configItem, isVisible = (
-            #     self._getVisibilityBasedOnConfig(childItem, configFather['layers']
-            #                                      if configFather and 'layers' in configFather else None))
-
-            # print('childItem', configItem, isVisible)
-            treeWidgetItem = self._getLayerItem(childItem, childItem.itemVisibilityChecked(), layerTree, layerTreeType,
-                                                isMoved)
-            item.insertChild(0, treeWidgetItem["item"])
-            layerTree.setItemWidget(treeWidgetItem["item"], 0, treeWidgetItem["widget"])
-            self._addChildren(childItem, treeWidgetItem["item"], layerTree, isMoved, layerTreeType)
+        nodes: List[QgsLayerTreeNode] = [child for child in root.children() if child.name() in privGkpgNamesInRoot]
+        for node in nodes:
+            self._registerNode(node)
+        self.privModel = LayerTreeModel(nodes)
+        self.leftPanel.privLayerTree.setModel(self.privModel)
+
+    def _registerNode(self, node: Union[QgsLayerTreeLayer, QgsLayerTreeGroup]) -> None:
+        """Checks the group names of a new node and its children, the widest label defines internWidth"""
+        self._checkGroupDuplication(isinstance(node, QgsLayerTreeGroup), node.name())
+        labelWidth: int = self.delegate.labelWidth(node.name())
+        if labelWidth > self.internWidth:
+            self.internWidth = labelWidth
+        for child in node.children():
+            self._registerNode(child)
 
     def _getLayerItemAnnotation(self) -> QWidget:
-        layerTree: QTreeWidget = self.leftPanel.annLayerTree
+        layerTree: QWidget = self.leftPanel.annLayerTree
         label: str = tr('Annotations/Notizen')
         lblWidget = QLabel(label)
         lblWidget.setWordWrap(True)
@@ -285,80 +273,21 @@ class LayerTrees(QObject):
             btnCheck.clicked.connect(partial(self._onBgChanged, btnCheck, childItem))
         return hLayout
 
-    def _getLayerItem(self, childItem: Union[QgsLayerTreeLayer, QgsLayerTreeGroup], isVisible: bool,
-                      layerTree: QTreeWidget, layerTreeType: LayerTreeType, isMoved: bool = False) \
-            -> Dict[CustomQTreeWidgetItem, QWidget]:
-
-        isFolder: bool = type(childItem) == QgsLayerTreeGroup
-        label = tr(childItem.name())
-        layerId = childItem.layerId() if hasattr(childItem, 'layerId') else label
-        # print('=========> isFolder', isFolder, 'label layerId', label, layerId, isMoved)
-
-        if not isMoved:
-            self._checkGroupDuplication(isFolder, label)
-
-        # if hasattr(childItem, 'layerId'):
-        #     # print('dataProvider', childItem.layer().dataProvider().dataSourceUri())
-        #     # print('dataProvider', childItem.layer().dataProvider().storageType())
-
-        # defines item and widget
-        item = CustomQTreeWidgetItem(layerId, label, isVisible, layerTree)
-        widget = QWidget()
-
-        folderWidget = QLabel('')
-        pixmap = QPixmap(os.path.join(self.pluginDir, 'icons/folder.png'))
-        scaled: QPixmap = pixmap.scaled(self.ICON_WIDTH, self.ICON_HEIGHT, Qt.KeepAspectRatio)
-        folderWidget.setPixmap(scaled)
-
-        lblWidget = QLabel(label)
-        lblWidget.setWordWrap(True)
-        lblWidget.setFont(self.LABEL_FONT)
-        btnCheck = self._getBtnCheck(isVisible)
-        btnUp = QPushButton("↑")
-        btnUp.setMaximumWidth(self.MOVE_BTN_WIDTH)
-        btnUp.setCursor(Qt.PointingHandCursor)
-        btnDown = QPushButton("↓")
-        btnDown.setMaximumWidth(self.MOVE_BTN_WIDTH)
-        btnDown.setCursor(Qt.PointingHandCursor)
-
-        hLayout = QHBoxLayout(layerTree)
-        
-        if isFolder:
-            hLayout.addWidget(folderWidget)
-        hLayout.addWidget(lblWidget)
-        hLayout.addStretch()
-        hLayout.addWidget(btnCheck)
-
-        hLayout.addWidget(btnUp)
-        hLayout.addWidget(btnDown)
-        hLayout.setSpacing(1)
-        widget.setLayout(hLayout)
-        widget.adjustSize()
-        lblWidgetWidth = lblWidget.size().width()
-        if lblWidgetWidth > self.internWidth:
-            self.internWidth = lblWidgetWidth
-
-        btnCheck.clicked.connect(partial(self._onCheckBtnChanged, item, btnCheck, layerTreeType))
-
-        btnUp.clicked.connect(partial(self._onMoveBtnChanged, item, childItem, True, layerTreeType))
-        btnDown.clicked.connect(partial(self._onMoveBtnChanged, item, childItem, False, layerTreeType))
-
-        return {'item': item, 'widget': widget}
-
     def _getBtnCheck(self, isVisible: bool):
         btnCheck = QPushButton()
         btnCheck.setMaximumWidth(self.BTN_CHECK_WIDTH)
         btnCheck.setCheckable(True)
         btnCheck.setChecked(isVisible)
-        if isVisible:
-            btnCheck.setIcon(QIcon(os.path.join(self.pluginDir, 'icons/checkbox.png')))
-        else:
-            btnCheck.setIcon(QIcon(os.path.join(self.pluginDir, 'icons/checkbox_dis.png')))
-        btnCheck.setIconSize(QSize(self.BTN_CHECK_WIDTH - 10, 40))
+        btnCheck.setIconSize(self.BTN_CHECK_ICON_SIZE)
+        self._setCheckIcon(btnCheck)
         btnCheck.setStyleSheet("QPushButton{background-color: transparent; border: transparent;margin: 0; padding: 5px; height: 15px;}")  # noqa
         btnCheck.setCursor(Qt.PointingHandCursor)
         return btnCheck
 
+    def _setCheckIcon(self, btnCheck: QPushButton) -> None:
+        iconName = 'checkbox.png' if btnCheck.isChecked() else 'checkbox_dis.png'
+        btnCheck.setIcon(IconCache.icon(iconName, self.BTN_CHECK_ICON_SIZE, btnCheck.devicePixelRatioF()))
+
     def _getBtnDelete(self):
         btnDel = QPushButton('Alle löschen')
         # btnCheck.setMaximumWidth(self.btnCheckWidth)
@@ -368,8 +297,8 @@ class LayerTrees(QObject):
 
     def _checkGroupDuplication(self, isFolder: bool, label: str):
         """Groups do not have any id => we use name to identify them.
-        Identification problem if two groups have same name (for example in class CustomQTreeWidgetItem
-        method findGroup() We use name to find out the group)!
+        Identification problem if two groups have same name (for example in LayerTrees.addLayerToPrivGroup
+        We use name to find out the group)!
 
         Args:
             isFolder: bool to check if folder
@@ -405,119 +334,45 @@ class LayerTrees(QObject):
     #
     #     return selConfigItem, isVisible
 
-    def _onCheckBtnChanged(self, item: CustomQTreeWidgetItem, btnCheck: QPushButton, layerTreeType: LayerTreeType):
-        """Toggles layer or group visibility in the QTreeWidget
+    def _onCheckClicked(self, index: QModelIndex) -> None:
+        """Toggles layer or group visibility in the layer tree
 
         Args:
-            item (CustomQTreeWidgetItem): item in layer tree
-            btnCheck (QPushButton): button wich works as checkbox
-            layerTreeType (LayerTreeType): layer type
+            index: index of the clicked row in pubModel or privModel
         """
-        # print(item, btnCheck.isChecked())
-        if btnCheck.isChecked():
-            btnCheck.setIcon(QIcon(os.path.join(self.pluginDir, 'icons/checkbox.png')))
-        else:
-            btnCheck.setIcon(QIcon(os.path.join(self.pluginDir, 'icons/checkbox_dis.png')))
-
-        item.checked = btnCheck.isChecked()
-        if layerTreeType == LayerTreeType.PUBLIC:
+        index.model().toggleChecked(index)
+        if index.model() is self.pubModel:
             # changes on files are done on close of the project in a macro
             pass
             # self.updatePubQlrSignal.emit()
         else:
             self.updateYamlSignal.emit()
 
-    def _onMoveBtnChanged(self, qtItem: CustomQTreeWidgetItem, childItem: Union[QgsLayerTreeLayer, QgsLayerTreeGroup],
-                          isUp: bool, layerTreeType: LayerTreeType) -> None:
+    def _onMoveClicked(self, index: QModelIndex, isUp: bool) -> None:
         """Moves items up and down in the list of layers
 
         Args:
-            qtItem: qt item in layer tree
-            childItem: qgs item in layer tree
+            index: index of the clicked row in pubModel or privModel
             isUp: layer moves up or down in the layer tree
-            layerTreeType (LayerTreeType): layer type
         """
-        # print('qtItem', qtItem, 'childItem', childItem, 'isUp', isUp)
-
-        # isExpanded = qtItem.isExpanded()
-        root = QgsProject.instance().layerTreeRoot()
-        fatherQtItem = qtItem.parent()
-        cloneChildItem = childItem.clone()
-        fatherGroup = childItem.parent()
-        # print('isExpanded_', isExpanded, 'count', count, 'root', root, 'i', i)
-
-        if fatherGroup == root:  # Group item
-            count: int
-            i: int
-            startI: int
-            iInRoot: int
-            count = qtItem.layerTree.topLevelItemCount()
-            i = qtItem.layerTree.indexOfTopLevelItem(qtItem)
-            startI = 1  # annotation
-            if layerTreeType == LayerTreeType.PRIVATE:
-                startI = len(self.pubQlrStr) + 1  # after annotation + public
-            iInRoot = startI + i - 1 if isUp else (startI + i + 2)
-
-            # print('startI', startI)
-            # print('in root-----------i', i, 'iInRoot', iInRoot)
-
-            if (isUp and i == 0) or (not isUp and i == count - 1):
-                return
-
-            qtItem.layerTree.takeTopLevelItem(i)
-            treeWidgetItem = self._getLayerItem(cloneChildItem, qtItem.checked, qtItem.layerTree, layerTreeType,
-                                                isMoved=True)
-            qtItem.layerTree.insertTopLevelItem(i - 1 if isUp else i + 1, treeWidgetItem["item"])
-            qtItem.layerTree.setItemWidget(treeWidgetItem["item"], 0, treeWidgetItem["widget"])
-            self._addChildren(cloneChildItem, treeWidgetItem["item"], qtItem.layerTree, True, layerTreeType)
-            del qtItem
-            fatherGroup.insertChildNode(iInRoot, cloneChildItem)
-            fatherGroup.removeChildNode(childItem)
-
-        else:  # Layer items + subgroups
-            count: int
-            i: int
-            if fatherGroup == root:
-                count = qtItem.layerTree.topLevelItemCount()
-                i = qtItem.layerTree.indexOfTopLevelItem(qtItem)
-            else:
-                count = fatherQtItem.childCount()
-                i = fatherQtItem.indexOfChild(qtItem)
-            # print('count', count)
-            # print('layers + subgroup  i............', i)
-            if (isUp and i == 0) or (not isUp and i == count - 1):
-                return
-
-            fatherQtItem.takeChild(i)
-            treeWidgetItem = self._getLayerItem(cloneChildItem, qtItem.checked, qtItem.layerTree, layerTreeType,
-                                                isMoved=True)
-            fatherQtItem.insertChild(i - 1 if isUp else i + 1, treeWidgetItem["item"])
-            qtItem.layerTree.setItemWidget(treeWidgetItem["item"], 0, treeWidgetItem["widget"])
-            del qtItem
-            fatherGroup.insertChildNode(i - 1 if isUp else i + 2, cloneChildItem)
-            fatherGroup.removeChildNode(childItem)
-
-        if layerTreeType == LayerTreeType.PUBLIC:
-            self.updatePubQlrSignal.emit()
-        # elif layerTreeType == LayerTreeType.PRIVATE:
-        #     self.updatePrivQlrSignal.emit()
-        #     self.updateYamlSignal.emit()
+        model: LayerTreeModel = index.model()
+        isTopLevel: bool = not index.parent().isValid()
+        if not model.moveNode(index, isUp):
+            return
+
+        if model is self.pubModel:
+            # sequence_qlr.yml has only the order of the groups, the QLR files are updated on close of the project
+            self.updatePubQlrSignal.emit(isTopLevel)
         else:
             self.updateYamlSignal.emit()
 
     def _onAnnotationChanged(self, btnCheck: QPushButton):
-        if btnCheck.isChecked():
-            btnCheck.setIcon(QIcon(os.path.join(self.pluginDir, 'icons/checkbox.png')))
-        else:
-            btnCheck.setIcon(QIcon(os.path.join(self.pluginDir, 'icons/checkbox_dis.png')))
+        self._setCheckIcon(btnCheck)
         self.updateAnnotationSignal.emit(btnCheck.isChecked(), False)
         self.updateYamlSignal.emit()
 
     def _onBgChanged(self, btnCheck: QPushButton, childItem: QgsLayerTreeLayer):
-        if btnCheck.isChecked():
-            btnCheck.setIcon(QIcon(os.path.join(self.pluginDir, 'icons/checkbox.png')))
-        else:
-            btnCheck.setIcon(QIcon(os.path.join(self.pluginDir, 'icons/checkbox_dis.png')))
+        self._setCheckIcon(btnCheck)
 
         childItem.setItemVisibilityChecked(btnCheck.isChecked())
         self.updateYamlSignal.emit()
@@ -0,0 +1,112 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtXml import QDomDocument
+from qgis.core import QgsLayerTreeGroup, QgsLayerTreeLayer, QgsLayerTreeNode, QgsMapLayer, QgsProject
+
+
+class LazyLayers(QObject):
+    """
+    Hidden private layers are not opened at startup: they are added to the layer tree as placeholders
+    (QgsLayerTreeLayer without a map layer, with the same name and visibility). As soon as a placeholder becomes
+    visible (the layer or its group is checked), the layer is created with createLayerFn and replaces the
+    placeholder at the same position. layerCreated is emitted with the id of the placeholder and the new node.
+    The placeholders remain in the layer tree of the session, but are not written into the project file.
+    """
+
+    PLACEHOLDER_PREFIX = "mofa4q_lazy:"
+
+    layerCreated = pyqtSignal(str, QgsLayerTreeLayer)
+
+    def __init__(self, createLayerFn: Callable[[str, Dict[str, Any]], Optional[QgsMapLayer]]):
+        super().__init__()
+        self.createLayerFn = createLayerFn
+        # placeholder id -> (file name of the gpkg, metadata of the table)
+        self._placeholders: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._isScheduled = False
+        QgsProject.instance().layerTreeRoot().visibilityChanged.connect(self._onVisibilityChanged)
+        QgsProject.instance().writeProject.connect(self._onWriteProject)
+        QgsProject.instance().cleared.connect(self._onCleared)
+
+    def addPlaceholder(self, groupNode: QgsLayerTreeGroup, filename: str, layerInGpkg: Dict[str, Any],
+                       isVisible: bool) -> QgsLayerTreeLayer:
+        """Appends a placeholder for a table of a private geopackage to groupNode
+
+        Args:
+            groupNode: group of the geopackage in the layer tree
+            filename: name of the geopackage in the private folder
+            layerInGpkg: metadata of the table (GpkgMetadata.getInfo)
+            isVisible: visibility of the layer
+
+        Returns:
+            the placeholder node
+        """
+        placeholderId = self.PLACEHOLDER_PREFIX + filename + ":" + layerInGpkg["identifier"]
+        node = QgsLayerTreeLayer(placeholderId, layerInGpkg["identifier"])
+        node.setItemVisibilityChecked(isVisible)
+        groupNode.insertChildNode(len(groupNode.children()), node)
+        self._placeholders[placeholderId] = (filename, layerInGpkg)
+        return node
+
+    def isPlaceholder(self, layerId: str) -> bool:
+        return layerId in self._placeholders
+
+    def createLayer(self, placeholderId: str) -> Optional[QgsLayerTreeLayer]:
+        """Creates the layer of a placeholder and replaces the placeholder in the layer tree
+
+        Returns:
+            the node of the new layer, None if the layer can not be created
+        """
+        node = QgsProject.instance().layerTreeRoot().findLayer(placeholderId)
+        filename, layerInGpkg = self._placeholders.pop(placeholderId)
+        if node is None:  # the geopackage has been removed
+            return None
+        layer = self.createLayerFn(filename, layerInGpkg)
+        if layer is None:
+            return None
+
+        parent: QgsLayerTreeGroup = node.parent()
+        index = next(i for i, child in enumerate(parent.children()) if child == node)
+        QgsProject.instance().addMapLayer(layer, False)
+        newNode = parent.insertLayer(index, layer)
+        newNode.setItemVisibilityChecked(node.itemVisibilityChecked())
+        # emitted before the placeholder is deleted: the receivers still may use its node
+        self.layerCreated.emit(placeholderId, newNode)
+        parent.removeChildNode(node)
+        return newNode
+
+    def reset(self) -> None:
+        QgsProject.instance().layerTreeRoot().visibilityChanged.disconnect(self._onVisibilityChanged)
+        QgsProject.instance().writeProject.disconnect(self._onWriteProject)
+        QgsProject.instance().cleared.disconnect(self._onCleared)
+        self._placeholders = {}
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _onVisibilityChanged(self, node: QgsLayerTreeNode) -> None:
+        # the signal is emitted while the check button of the layer tree is handled: the layers are created later,
+        # when replacing the item of the button is safe. A group may contain several placeholders.
+        if self._placeholders and not self._isScheduled:
+            self._isScheduled = True
+            QTimer.singleShot(0, self._createVisibleLayers)
+
+    def _createVisibleLayers(self) -> None:
+        self._isScheduled = False
+        root = QgsProject.instance().layerTreeRoot()
+        for placeholderId in list(self._placeholders):
+            node = root.findLayer(placeholderId)
+            if node is None:
+                del self._placeholders[placeholderId]
+            elif node.isVisible():
+                self.createLayer(placeholderId)
+
+    def _onWriteProject(self, document: QDomDocument) -> None:
+        # the layer tree has already been written: the placeholders (ids without a map layer) are removed from it
+        elements = document.elementsByTagName("layer-tree-layer")
+        placeholders = [elements.at(i).toElement() for i in range(elements.count())
+                        if elements.at(i).toElement().attribute("id").startswith(self.PLACEHOLDER_PREFIX)]
+        for element in placeholders:
+            element.parentNode().removeChild(element)
+
+    def _onCleared(self) -> None:
+        # the layer tree with the placeholders has been removed
+        self._placeholders = {}
@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LruCache:
+    """
+    Bounded least recently used cache with time to live.
+    If a signature function is given (e.g. size and mtime of a file), the cache is cleared as soon as the
+    signature changes.
+    """
+
+    def __init__(self, maxSize: int, ttl: Optional[float] = None, signatureFn: Optional[Callable[[], Any]] = None):
+        self.maxSize = maxSize
+        self.ttl = ttl
+        self.signatureFn = signatureFn
+        self._items: OrderedDict = OrderedDict()
+        self._signature = self._currentSignature()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value or None if it is missing or expired"""
+        self._checkSignature()
+        item = self._items.get(key)
+        if item is None:
+            return None
+        value, timestamp = item
+        if self.ttl and time.monotonic() - timestamp > self.ttl:
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxSize <= 0:
+            return
+        self._checkSignature()
+        self._items[key] = (value, time.monotonic())
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxSize:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _currentSignature(self) -> Any:
+        if not self.signatureFn:
+            return None
+        try:
+            return self.signatureFn()
+        except OSError:
+            return None
+
+    def _checkSignature(self) -> None:
+        signature = self._currentSignature()
+        if signature != self._signature:
+            self._signature = signature
+            self._items.clear()
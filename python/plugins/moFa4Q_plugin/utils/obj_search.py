@@ -1,5 +1,6 @@
 from PyQt5.QtGui import QColor
 from .search import Search
+from .search_source import ObjSearchSource
 
 
 class ObjSearch(Search):
@@ -8,9 +9,8 @@ class ObjSearch(Search):
     matched addresses
     """
 
-    STR_QUERY = "SELECT search FROM objektsuche WHERE search LIKE ?"
-    STR_QUERY_GEOM = "SELECT X(geom), Y(geom), SRID(geom) FROM objektsuche WHERE search = ?"
+    SOURCE_CLASS = ObjSearchSource
     COLOR_VERTEX = QColor(222, 13, 13)
 
-    def __init__(self, iface, filePath, lineEditSearch, pushButton):
-        super().__init__(iface, filePath, lineEditSearch, pushButton)
+    def __init__(self, iface, filePath, lineEditSearch, pushButton, config=None):
+        super().__init__(iface, filePath, lineEditSearch, pushButton, config)
@@ -0,0 +1,99 @@
+import argparse
+import ast
+import importlib
+import os
+import struct
+import sys
+from typing import Dict, Optional
+
+
+class PluginResources:
+    """
+    Registers the Qt resources of the plugin (icons with paths ':/plugins/moFa4Q_plugin/...') only when they are
+    needed instead of at the import of the plugin.
+    If resources.rcc exists, it is registered with QResource.registerResource: Qt maps the file into memory,
+    the icons are not loaded as Python bytes. Otherwise the generated module resources.py is imported.
+    resources.rcc is built from resources.py (no Qt tools needed):
+
+        python -m utils.plugin_resources
+    """
+
+    PLUGIN_DIR = os.path.dirname(os.path.dirname(__file__))
+    RCC_FILE = "resources.rcc"
+    PY_FILE = "resources.py"
+    RCC_VERSION = 2
+
+    _registeredRcc: Optional[str] = None
+    _module = None
+
+    @classmethod
+    def register(cls) -> None:
+        """Registers the resources, it can be called several times"""
+        if cls.isRegistered():
+            return
+        rccPath = os.path.join(cls.PLUGIN_DIR, cls.RCC_FILE)
+        if os.path.isfile(rccPath):
+            from PyQt5.QtCore import QResource
+            if QResource.registerResource(rccPath):
+                cls._registeredRcc = rccPath
+                return
+        # the generated module registers its data at the first import
+        moduleName = __package__.rsplit(".", 1)[0] + ".resources"
+        isImported = moduleName in sys.modules
+        cls._module = importlib.import_module(moduleName)
+        if isImported:
+            cls._module.qInitResources()
+
+    @classmethod
+    def unregister(cls) -> None:
+        if cls._registeredRcc is not None:
+            from PyQt5.QtCore import QResource
+            QResource.unregisterResource(cls._registeredRcc)
+            cls._registeredRcc = None
+        elif cls._module is not None:
+            cls._module.qCleanupResources()
+            cls._module = None
+
+    @classmethod
+    def isRegistered(cls) -> bool:
+        return cls._registeredRcc is not None or cls._module is not None
+
+    @classmethod
+    def buildRcc(cls, pyPath: str, rccPath: str) -> int:
+        """Writes the data of the module generated by pyrcc5 as binary resource file (format of rcc -binary)
+
+        Args:
+            pyPath: path of resources.py
+            rccPath: path of the written resources.rcc
+
+        Returns:
+            size of resources.rcc in bytes
+        """
+        with open(pyPath, "r", encoding="utf-8") as pyFile:
+            module = ast.parse(pyFile.read(), pyPath)
+        blobs: Dict[str, bytes] = {}
+        for node in module.body:
+            if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) \
+                    and isinstance(node.value.value, bytes):
+                blobs[node.targets[0].id] = node.value.value
+        data, names, tree = blobs["qt_resource_data"], blobs["qt_resource_name"], blobs["qt_resource_struct_v2"]
+
+        # header: magic, version, offsets of tree, data and names; the blobs follow in the order of rcc
+        headerSize = 4 + 4 * 4
+        dataOffset = headerSize
+        namesOffset = dataOffset + len(data)
+        treeOffset = namesOffset + len(names)
+        with open(rccPath, "wb") as rccFile:
+            rccFile.write(b"qres" + struct.pack(">IIII", cls.RCC_VERSION, treeOffset, dataOffset, namesOffset))
+            rccFile.write(data)
+            rccFile.write(names)
+            rccFile.write(tree)
+        return treeOffset + len(tree)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds resources.rcc from resources.py")
+    parser.add_argument("--py", default=os.path.join(PluginResources.PLUGIN_DIR, PluginResources.PY_FILE))
+    parser.add_argument("--rcc", default=os.path.join(PluginResources.PLUGIN_DIR, PluginResources.RCC_FILE))
+    args = parser.parse_args()
+    print("{}: {} bytes".format(args.rcc, PluginResources.buildRcc(args.py, args.rcc)))
@@ -0,0 +1,45 @@
+from typing import Any, Callable, Dict, List, Optional
+
+from PyQt5.QtCore import pyqtSignal
+from qgis.core import QgsApplication, QgsMapLayer, QgsTask
+
+from .tr import tr
+
+
+class PrivateGpkgLoader(QgsTask):
+    """
+    Opens the layers of a private geopackage in a background task, so that the left panel stays responsive when a
+    large geopackage is added. The layers are created with openLayerFn in the thread of the task, moved to the
+    main thread and emitted in batches of BATCH_SIZE (batchLoaded), so the first layers can be added to the
+    layer tree before the others are opened. The layers are emitted in the order of layersInGpkg; the layers
+    which are not valid are emitted as None.
+    """
+
+    BATCH_SIZE = 5
+
+    batchLoaded = pyqtSignal(list)
+
+    def __init__(self, filename: str, layersInGpkg: List[Dict[str, Any]],
+                 openLayerFn: Callable[[str, Dict[str, Any]], Optional[QgsMapLayer]]):
+        super().__init__(tr("Geopackage {} wird geladen").format(filename), QgsTask.CanCancel)
+        self.filename = filename
+        self.layersInGpkg = layersInGpkg
+        self.openLayerFn = openLayerFn
+
+    def run(self) -> bool:
+        mainThread = QgsApplication.instance().thread()
+        batch = []
+        for i, layerInGpkg in enumerate(self.layersInGpkg):
+            if self.isCanceled():
+                return False
+            layer = self.openLayerFn(self.filename, layerInGpkg)
+            if layer is not None:
+                layer.moveToThread(mainThread)
+            batch.append((layerInGpkg, layer))
+            if len(batch) == self.BATCH_SIZE:
+                self.batchLoaded.emit(batch)
+                batch = []
+            self.setProgress(100 * (i + 1) / len(self.layersInGpkg))
+        if batch:
+            self.batchLoaded.emit(batch)
+        return True
@@ -0,0 +1,82 @@
+import copy
+import os
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import yaml
+from PyQt5.QtCore import QObject, QTimer
+from qgis.core import Qgis, QgsMessageLog
+
+
+class ProjConfWriter(QObject):
+    """
+    Write-behind persistence of prj_conf.yaml. schedule is called for every change (check button, move, ...), the
+    changes within DELAY_MS are coalesced into one write. The configuration is built with buildConfFn in the GUI
+    thread (it reads the layer tree), a copy of it is written in a worker thread: into a temporary file next to
+    prj_conf.yaml, which then replaces it (os.replace), so the file is never half written.
+    flush writes pending changes at once and waits for the worker (unload, close of the project). After close
+    nothing is written any more.
+    """
+
+    DELAY_MS = 500
+
+    def __init__(self, path: str, buildConfFn: Callable[[], Dict[str, Any]]):
+        super().__init__()
+        self.path = path
+        self.buildConfFn = buildConfFn
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._lastWrite: Optional[Future] = None
+        self._closed = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DELAY_MS)
+        self._timer.timeout.connect(self._submit)
+
+    def schedule(self) -> None:
+        """Writes the configuration DELAY_MS after the last call (ignored after close)"""
+        if self._closed:
+            return
+        self._timer.start()
+
+    def isPending(self) -> bool:
+        return self._timer.isActive() or (self._lastWrite is not None and not self._lastWrite.done())
+
+    def flush(self) -> None:
+        """Writes pending changes and waits until the file is written"""
+        if self._timer.isActive():
+            self._timer.stop()
+            self._submit()
+        if self._lastWrite is not None:
+            self._lastWrite.result()
+
+    def close(self) -> None:
+        """Flushes and stops the timer and the worker thread, later calls of schedule and flush are ignored"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._timer.stop()
+        self._timer.timeout.disconnect(self._submit)
+        self._executor.shutdown(wait=True)
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _submit(self) -> None:
+        if self._closed:
+            return
+        conf = copy.deepcopy(self.buildConfFn())
+        self._lastWrite = self._executor.submit(self._write, self.path, conf)
+
+    @staticmethod
+    def _write(path: str, conf: Dict[str, Any]) -> None:
+        folder = os.path.dirname(path) or "."
+        fd, tmpPath = tempfile.mkstemp(prefix=".prj_conf_", suffix=".tmp", dir=folder)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf8') as outfile:
+                yaml.dump(conf, outfile)
+            os.replace(tmpPath, path)
+        except Exception as e:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            # QgsMessageLog is thread-safe
+            QgsMessageLog.logMessage(f"{os.path.basename(path)} not written: {e}", level=Qgis.Critical)
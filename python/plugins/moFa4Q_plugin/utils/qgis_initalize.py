@@ -1,6 +1,9 @@
+import hashlib
 import os
 import re
-from shutil import copyfile
+import shutil
+import tempfile
+from typing import Iterable, Iterator
 
 from PyQt5.QtCore import QSettings
 
@@ -9,6 +12,7 @@ class QgisInitialize:
     """ Initialize Settings from qgis init-file"""
     TEST_SEARCH = "%PROFILE_FOLDER%"
     QGIS_PROJ_OPEN_AT_LAUNCH_PATH = "qgis/projOpenAtLaunchPath"
+    INI_FILES = ("QGIS3.ini", "QGISCUSTOMIZATION3.ini")
 
     def __init__(self, iface, profile_path, default_install_path, default_project, text_to_search=None):
         self.locale = None
@@ -39,30 +43,53 @@ class QgisInitialize:
         textToReplace = dirPath.replace('\\', '/')
 
         if os.path.isdir(dirPath):
-            copyfile(os.path.normcase(dirPath + "/init/QGIS3.ini"), os.path.normcase(dirPath + "/QGIS/QGIS3.ini"))
-            copyfile(os.path.normcase(dirPath + "/init/QGISCUSTOMIZATION3.ini"),
-                     os.path.normcase(dirPath + "/QGIS/QGISCUSTOMIZATION3.ini"))
-
-            filename = os.path.join(dirPath + "/QGIS/QGIS3.ini")
-            if os.path.isfile(filename):
-                with open(filename, 'r') as instream:
-                    content = instream.read()
-                content = re.sub(self.TEST_SEARCH, textToReplace, content)
-                with open(filename, 'w') as outstream:
-                    outstream.write(content)
-
-            filename = os.path.join(dirPath + "/QGIS/QGISCUSTOMIZATION3.ini")
-            if os.path.isfile(filename):
-                with open(filename, 'r') as instream:
-                    content = instream.read()
-                content = re.sub(self.TEST_SEARCH, textToReplace, content)
-                with open(filename, 'w') as outstream:
-                    outstream.write(content)
-
-        # Closing the file after the loop finishes
-        outstream.close()
-        # Reload QSettings
-        self._sync()
+            is_changed = False
+            for iniName in self.INI_FILES:
+                is_changed |= self._render_template(os.path.normcase(dirPath + "/init/" + iniName),
+                                                    os.path.normcase(dirPath + "/QGIS/" + iniName), textToReplace)
+            if is_changed:
+                # Reload QSettings
+                self._sync()
+
+    def _render_lines(self, template_path: str, text_to_replace: str) -> Iterator[str]:
+        """ Lines of the template with TEST_SEARCH replaced (the placeholder never spans lines) """
+        pattern = re.compile(self.TEST_SEARCH)
+        with open(template_path, 'r') as instream:
+            for line in instream:
+                yield pattern.sub(text_to_replace, line)
+
+    @staticmethod
+    def _hash_lines(lines: Iterable[str]) -> str:
+        content_hash = hashlib.sha256()
+        for line in lines:
+            content_hash.update(line.encode('utf-8', 'surrogateescape'))
+        return content_hash.hexdigest()
+
+    def _render_template(self, template_path: str, target_path: str, text_to_replace: str) -> bool:
+        """ Writes the template with TEST_SEARCH replaced to target_path. The file is written only if its content
+        changes (compared by hash), into a temporary file which replaces the target, so a crash never leaves a
+        half written ini file.
+
+        Returns:
+            True if target_path has been written
+        """
+        if not os.path.isfile(template_path):
+            return False
+        if os.path.isfile(target_path):
+            with open(target_path, 'r') as target:
+                if self._hash_lines(target) == self._hash_lines(self._render_lines(template_path, text_to_replace)):
+                    return False
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as outstream:
+                outstream.writelines(self._render_lines(template_path, text_to_replace))
+            shutil.copymode(template_path, tmp_path)
+            os.replace(tmp_path, target_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return True
 
     def get_locale(self):
         """ Get Locale env from QSettings"""
@@ -0,0 +1,88 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+from PyQt5.QtXml import QDomDocument
+from qgis.core import (QgsLayerDefinition, QgsLayerTreeGroup, QgsPathResolver, QgsProject,
+                       QgsReadWriteContext)
+
+
+class QlrLoadResult(NamedTuple):
+    path: str
+    isValid: bool
+    error: str
+    parseTime: float  # seconds (in the thread pool)
+    loadTime: float  # seconds (in the GUI thread)
+
+
+class QlrLoader:
+    """
+    Loads several QLR files into a layer tree group. The files are read and parsed concurrently in a thread pool,
+    the layers are created in the GUI thread (QgsLayerDefinition adds them to the project, which is not thread-safe).
+    The nodes of each QLR are inserted directly at their final position: the first QLR at index, the next ones
+    after it, so the order of the files is kept without reordering the tree afterwards.
+    """
+
+    MAX_WORKERS = 4
+
+    def __init__(self, project: QgsProject):
+        self.project = project
+
+    def load(self, paths: List[str], rootGroup: QgsLayerTreeGroup, index: int = 0) -> List[QlrLoadResult]:
+        """Loads the QLR files in the given order
+
+        Args:
+            paths: paths of the QLR files
+            rootGroup: group of the layer tree the nodes are inserted in
+            index: position of the nodes of the first QLR in rootGroup
+
+        Returns:
+            one result for each QLR file (same order as paths)
+        """
+        if not paths:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(paths))) as pool:
+            parsed = list(pool.map(self._parse, paths))
+
+        results = []
+        for path, (document, error, parseTime) in zip(paths, parsed):
+            start = time.perf_counter()
+            count = 0
+            if document is not None:
+                isValid, error, count = self._insert(path, document, rootGroup, index)
+            else:
+                isValid = False
+            index += count
+            results.append(QlrLoadResult(path, isValid, error, parseTime, time.perf_counter() - start))
+        return results
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _parse(path: str) -> Tuple[Optional[QDomDocument], str, float]:
+        start = time.perf_counter()
+        try:
+            with open(path, 'rb') as qlrFile:
+                content = qlrFile.read()
+        except OSError as e:
+            return None, str(e), time.perf_counter() - start
+        document = QDomDocument('qgis-layer-definition')
+        isParsed, error, line, column = document.setContent(content)
+        if not isParsed:
+            return None, f"{error} ({os.path.basename(path)}:{line}:{column})", time.perf_counter() - start
+        return document, "", time.perf_counter() - start
+
+    def _insert(self, path: str, document: QDomDocument, rootGroup: QgsLayerTreeGroup, index: int) \
+            -> Tuple[bool, str, int]:
+        """Loads the layers of the document into a detached group and moves its nodes to rootGroup at index"""
+        context = QgsReadWriteContext()
+        context.setPathResolver(QgsPathResolver(path))
+        context.setProjectTranslator(self.project)
+        group = QgsLayerTreeGroup()
+        isValid, error = QgsLayerDefinition.loadLayerDefinition(document, self.project, group, context)
+        if hasattr(group, 'abandonChildren'):  # not available in older QGIS versions
+            nodes = group.abandonChildren()
+        else:
+            nodes = [node.clone() for node in group.children()]
+        rootGroup.insertChildNodes(index, nodes)
+        return isValid, error, len(nodes)
@@ -1,16 +1,20 @@
+import math
 import os.path
 import sqlite3
 import traceback
 
-import qgis.utils
-from PyQt5.QtCore import QStringListModel, Qt
+from PyQt5.QtCore import QModelIndex, Qt, QTimer
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QCompleter
 from qgis.core import (Qgis, QgsCoordinateReferenceSystem,
-                       QgsCoordinateTransform, QgsPoint, QgsPointXY,
-                       QgsProject)
+                       QgsCoordinateTransform, QgsCsException, QgsMessageLog,
+                       QgsPoint, QgsPointXY, QgsProject)
 from qgis.gui import QgsVertexMarker
 
+from .lru_cache import LruCache
+from .search_model import SearchResultModel
+from .search_source import SearchSource
+from .search_worker import SearchWorker
 from .tr import tr
 from abc import ABC
 
@@ -18,13 +22,23 @@ from abc import ABC
 class Search(ABC):
     """
     Reads a geopackage and searchs in the table attribute table the
-    matched text
+    matched text. The queries are defined by SOURCE_CLASS (see search_source.py), which uses the FTS5 sidecar
+    index and precomputed coordinates of the geopackage if available.
+    The queries run in a SearchWorker thread, so typing never blocks the canvas.
+    Results and coordinates are kept in a LRU cache (prj_conf.yaml: search: cacheSize, cacheTtl in seconds),
+    which is cleared when the geopackage changes.
+    Each completion carries row id and coordinates (SearchResultModel), so selecting it needs no further query.
+    With search: fuzzy the texts are found also with typos (needs the index, see search_index.py).
+    The results near the canvas center come first (search: proximity, needs the spatial index of the geopackage).
     """
-    STR_QUERY = "SELECT address FROM addresses WHERE address LIKE ?"
-    STR_QUERY_GEOM = "SELECT X(geom), Y(geom), SRID(geom) FROM addresses WHERE address = ?"
-    #STR_QUERY_GEOM = "SELECT geom, X(geom), Y(geom) FROM addresses"
+    SOURCE_CLASS = SearchSource
     TABLE_EPSG = "EPSG:4326"
     MAX_VISIBLE_ITEMS = 15
+    MIN_PATTERN_LENGTH = 3
+    DEBOUNCE_MS = 250
+    MAX_RESULTS = 500
+    CACHE_SIZE = 256
+    CACHE_TTL = 3600
     COLOR_VERTEX = QColor(153, 0, 204)
     SIZE_VERTEX = 24
     PEN_VERTEX = 4
@@ -32,26 +46,48 @@ class Search(ABC):
     marker = None
     gPntXY = None
 
-    def __init__(self, iface, filePath, lineEditSearch, pushButtonShow):
+    def __init__(self, iface, filePath, lineEditSearch, pushButtonShow, config=None):
         self.conn = None
+        self.source = None
+        self.worker = None
+        self.modelPattern = None
+        self.modelIsComplete = False
+        self.transforms = {}
         self.iface = iface
+        config = config or {}
+        self.fuzzy = config.get('fuzzy', False)
+        self.proximity = config.get('proximity', True)
+        self.centers = None
+        self.centerKey = None
+        self.centerTransforms = {}
         try:
-            if os.path.isfile(filePath) is False:
-                raise DBConnEx(tr("Der Geopackage-File {} für die Suche wurde nicht gefunden.").format(os.path.basename(filePath)))
-            else:
-                self.lineEditSearch = lineEditSearch
-                self.pushButtonShow = pushButtonShow
+            self.lineEditSearch = lineEditSearch
+            self.pushButtonShow = pushButtonShow
 
-                self.createDBConn(filePath)
-                self.conn.cursor()
+            self.initSource(filePath)
 
-                self.completer = self.getCompleter()
-                self.lineEditSearch.setCompleter(self.completer)
-                self.model = QStringListModel()
-                self.completer.setModel(self.model)
+            cacheSize = config.get('cacheSize', self.CACHE_SIZE)
+            cacheTtl = config.get('cacheTtl', self.CACHE_TTL)
+            self.textCache = LruCache(cacheSize, cacheTtl, self.getSignature)
+            self.geomCache = LruCache(cacheSize, cacheTtl, self.getSignature)
 
-                self.lineEditSearch.textChanged.connect(self.textChanged)
-                self.pushButtonShow.clicked.connect(self.centerMarkerOnCanvas)
+            self.completer = self.getCompleter()
+            self.lineEditSearch.setCompleter(self.completer)
+            self.model = SearchResultModel()
+            self.completer.setModel(self.model)
+
+            self.debounceTimer = QTimer()
+            self.debounceTimer.setSingleShot(True)
+            self.debounceTimer.setInterval(self.DEBOUNCE_MS)
+            self.debounceTimer.timeout.connect(self.getDataFromDb)
+
+            self.worker = SearchWorker(self.createWorkerConn, self.queryResults)
+            self.worker.resultsReady.connect(self._onResultsReady)
+            self.worker.queryFailed.connect(self._onQueryFailed)
+            self.worker.start()
+
+            self.lineEditSearch.textChanged.connect(self.textChanged)
+            self.pushButtonShow.clicked.connect(self.centerMarkerOnCanvas)
 
         except DBConnEx as erMsg:
             self.iface.messageBar().pushMessage(tr("Warning"), tr(
@@ -61,55 +97,186 @@ class Search(ABC):
             self.iface.messageBar().pushMessage(tr("Warning"), tr(
                 "Die Suche kann nicht verwendet werden. Fehler nicht behoben: {}").format(traceback.format_exc()), level=Qgis.Info)
 
+    def initSource(self, filePath):
+        if os.path.isfile(filePath) is False:
+            raise DBConnEx(tr("Der Geopackage-File {} für die Suche wurde nicht gefunden.")
+                           .format(os.path.basename(filePath)))
+        self.source = self.SOURCE_CLASS(filePath, fuzzy=self.fuzzy)
+        self.createDBConn()
+
     def getCompleter(self):
         completer = QCompleter()
         completer.setCaseSensitivity(Qt.CaseInsensitive)
         completer.setMaxVisibleItems(self.MAX_VISIBLE_ITEMS)
         completer.setFilterMode(Qt.MatchContains)
-        completer.activated.connect(self.getPoi)
+        if self.fuzzy:
+            # the results contain texts with typos, which the completer must not filter out
+            completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        completer.activated[QModelIndex].connect(self.getPoi)
         return completer
 
-    def createDBConn(self, path):
+    def createDBConn(self):
         try:
-            self.conn = qgis.utils.spatialite_connect(path)
+            self.conn = self.source.connect()
         except sqlite3.Error:
             raise DBConnEx(tr("Problem to connect to the server."))
 
+    def createWorkerConn(self):
+        """ Connection used in the worker thread (sqlite connections can not be shared between threads) """
+        return self.source.connect()
+
+    def getSignature(self):
+        """ Changes when the geopackage has been replaced, clears the caches """
+        return self.source.signature()
+
     def resetAll(self):
         """ Closes the connection - It used when plugin is unloaded """
+        if self.worker:
+            self.debounceTimer.stop()
+            self.worker.stop()
         if self.conn:
             self.conn.close()
         if self.marker:
             self.iface.mapCanvas().scene().removeItem(self.marker)
 
+    def queryResults(self, conn, pattern):
+        """ Runs in the worker thread: returns max MAX_RESULTS + 1 SearchResults containing the pattern
+        (the additional row shows that the result is truncated) """
+        return self.source.query(conn, pattern, self.MAX_RESULTS + 1, self.centers)
+
+    def getSrsIds(self):
+        """ CRS of the sources, in which the canvas center is needed """
+        return {self.source.srsId} - {None}
+
     def getDataFromDb(self):
-        self.c = self.conn.cursor()
-        rows = self.c.execute(self.STR_QUERY, ['%' + self.lineEditSearch.text() + '%']).fetchall()
-        resultsQuery = []
-        for sqlRow in rows:
-            resultsQuery.append(sqlRow[0])
-        self.model.setStringList(resultsQuery)
-        self.c.close()
+        """ Submits the current text to the worker, the results are set in _onResultsReady """
+        pattern = str(self.lineEditSearch.text())
+        if len(pattern) >= self.MIN_PATTERN_LENGTH:
+            self.worker.submit(pattern)
 
     def textChanged(self):
-        """ Updates the list of possible completions each time a key is pressed for 3 letters """
-        #print("=========> textChanged!")
+        """ Updates the list of possible completions when at least 3 letters are typed.
+        If the text extends the text of the last query and its result was complete, the result is only filtered
+        (not in fuzzy mode: a text with typos may match rows, which the shorter text did not).
+        Otherwise the database is queried again (max MAX_RESULTS rows). While waiting for the new result the old
+        one remains visible, as long as it still matches the text.
+        """
         pattern = str(self.lineEditSearch.text())
-        if len(pattern) < 3:
-            self.model.setStringList([])
-        elif len(pattern) == 3 and self.model.stringList() == []:
-            self.getDataFromDb()
-
-    def getPoi(self):
-        """ Gets Poi of the selected research """
-        self.c = self.conn.cursor()
-        self.c.execute("select EnableGpkgAmphibiousMode()")
-        rslt = self.c.execute(self.STR_QUERY_GEOM, [self.lineEditSearch.text()]).fetchone()
-        #print("geom: ", rslt)
-        self.c.close()
-        print(rslt[2])
+        self._updateCenters()
+        cachedResults = self.textCache.get(self._cacheKey(pattern))
+        if len(pattern) < self.MIN_PATTERN_LENGTH:
+            self.debounceTimer.stop()
+            self.worker.cancel()
+            self._setModel(None, [], False)
+        elif self._isRefinement(pattern) and self.modelIsComplete and not self.fuzzy:
+            self.debounceTimer.stop()
+            self.worker.cancel()
+            self._refineModel(pattern)
+        elif cachedResults is not None:
+            self.debounceTimer.stop()
+            self.worker.cancel()
+            self._applyResults(pattern, cachedResults)
+        else:
+            if not self._isRefinement(pattern):
+                self._setModel(None, [], False)
+            self.debounceTimer.start()
+
+    def getPoi(self, index=None):
+        """ Gets Poi of the selected research. The coordinates come with the selected completion,
+        the database is queried only if they are not available """
+        result = index.data(SearchResultModel.RESULT_ROLE) if index is not None else None
+        if result is not None:
+            canvasAuthid = self.iface.mapCanvas().mapSettings().destinationCrs().authid()
+            if result.projX is not None and canvasAuthid == "EPSG:{}".format(result.projSrid):
+                self.addMarkerOnCanvas(result.projX, result.projY, result.projSrid)
+            elif result.x is not None:
+                self.addMarkerOnCanvas(result.x, result.y, result.srid)
+            return
+
+        text = self.lineEditSearch.text()
+        rslt = self.geomCache.get(text)
+        if rslt is None:
+            rslt = self.queryGeom(text)
+            #print("geom: ", rslt)
+            if rslt is None:
+                return
+            self.geomCache.put(text, rslt)
         self.addMarkerOnCanvas(rslt[0], rslt[1], rslt[2])
 
+    def queryGeom(self, text):
+        """ Coordinates (x, y, srid) of the row with exactly this text, None if not found """
+        if self.conn is None:
+            return None
+        return self.source.queryGeom(self.conn, text)
+
+    def _cacheKey(self, pattern):
+        """ Results sorted by the distance depend also on the canvas position """
+        return pattern.lower(), self.centerKey
+
+    def _updateCenters(self):
+        """ Canvas center and radius (half the extent height) in the CRS of each source """
+        if not self.proximity:
+            return
+        canvas = self.iface.mapCanvas()
+        extent = canvas.extent()
+        canvasCrs = canvas.mapSettings().destinationCrs()
+        if extent.isEmpty():
+            self.centers = self.centerKey = None
+            return
+        # results are queried again, if the canvas has been moved by a quarter of the extent or zoomed
+        cellSize = max(extent.width(), extent.height()) / 4
+        self.centerKey = (canvasCrs.authid(), round(extent.center().x() / cellSize),
+                          round(extent.center().y() / cellSize), round(math.log2(cellSize)))
+        centers = {}
+        for srsId in self.getSrsIds():
+            key = (canvasCrs.authid(), srsId)
+            if key not in self.centerTransforms:
+                destCrs = QgsCoordinateReferenceSystem("EPSG:{}".format(srsId))
+                self.centerTransforms[key] = QgsCoordinateTransform(canvasCrs, destCrs, QgsProject.instance())
+            try:
+                box = self.centerTransforms[key].transformBoundingBox(extent)
+            except QgsCsException:
+                continue
+            centers[srsId] = (box.center().x(), box.center().y(), box.height() / 2)
+        self.centers = centers
+
+    def _isRefinement(self, pattern):
+        """ Every text containing pattern contains also the text of the last query """
+        return self.modelPattern is not None and self.modelPattern.lower() in pattern.lower()
+
+    def _setModel(self, pattern, results, isComplete):
+        self.modelPattern = pattern
+        self.modelIsComplete = isComplete
+        self.model.setResults(results)
+
+    def _refineModel(self, pattern):
+        """ Filters the complete result of the last query with the longer pattern """
+        if pattern.lower() == self.modelPattern.lower():
+            return
+        lowerPattern = pattern.lower()
+        results = [result for result in self.model.results() if lowerPattern in result.text.lower()]
+        self._setModel(pattern, results, True)
+
+    def _onResultsReady(self, generation, pattern, results):
+        self.textCache.put(self._cacheKey(pattern), results)
+        self._applyResults(pattern, results)
+
+    def _applyResults(self, pattern, results):
+        """ Results of a query are used only if they still match the current text """
+        currentText = str(self.lineEditSearch.text())
+        if len(currentText) < self.MIN_PATTERN_LENGTH or pattern.lower() not in currentText.lower():
+            return
+        isComplete = len(results) <= self.MAX_RESULTS
+        self._setModel(pattern, results[:self.MAX_RESULTS], isComplete)
+        if isComplete and not self.fuzzy:
+            self._refineModel(currentText)
+        if self.lineEditSearch.hasFocus():
+            self.completer.setCompletionPrefix(currentText)
+            self.completer.complete()
+
+    def _onQueryFailed(self, erMsg):
+        QgsMessageLog.logMessage(tr("Fehler bei der Suche: {}").format(erMsg), level=Qgis.Warning)
+
     def addMarkerOnCanvas(self, x, y, srid):
         """ Add a POI to the canvas """
         canvas = self.iface.mapCanvas()
@@ -136,14 +303,20 @@ class Search(ABC):
         canvas.zoomScale(self.ZOOM_SCALE)
 
     def convertCRS(self, gPnt, canvas):
-        sourceCrs = QgsCoordinateReferenceSystem()
-        sourceCrs.createFromString(self.TABLE_EPSG)
+        """ Transforms the point from TABLE_EPSG in the canvas CRS. The transformation is created only once
+        for each canvas CRS """
+        destAuthid = canvas.mapSettings().destinationCrs().authid()
+        transform = self.transforms.get(destAuthid)
+        if transform is None:
+            sourceCrs = QgsCoordinateReferenceSystem()
+            sourceCrs.createFromString(self.TABLE_EPSG)
 
-        destCrs = QgsCoordinateReferenceSystem()
-        destCrs.createFromString(canvas.mapSettings().destinationCrs().authid())
+            destCrs = QgsCoordinateReferenceSystem()
+            destCrs.createFromString(destAuthid)
 
-        tr = QgsCoordinateTransform(sourceCrs, destCrs, QgsProject.instance())
-        gPnt.transform(tr)
+            transform = QgsCoordinateTransform(sourceCrs, destCrs, QgsProject.instance())
+            self.transforms[destAuthid] = transform
+        gPnt.transform(transform)
         return gPnt
 
 
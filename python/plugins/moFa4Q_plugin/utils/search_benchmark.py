@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Benchmark of the address and object search without QGIS.
+
+ Generates synthetic search geopackages (addresses.gpkg, search_objects.gpkg) and types representative texts
+ letter by letter through the search pipeline (query of the worker thread, incremental refinement of the
+ completions, coordinates of the selected completion). Latencies (p50/p95/p99) and peak memory are reported.
+ It has to be started from the plugin folder (python/plugins/moFa4Q_plugin):
+
+    python -m utils.search_benchmark /tmp/bench --generate --rows 1000000 --index
+    python -m utils.search_benchmark /tmp/bench --fuzzy --json result.json
+ ***************************************************************************/
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import struct
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .search_engine import FederatedSearchEngine
+from .search_index import SearchIndex
+from .search_source import ObjSearchSource, SearchResult, SearchSource
+
+try:
+    import resource
+except ImportError:  # Windows: the peak of the process memory is taken from psutil if available
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    from .search_model import SearchResultModel
+except ImportError:  # without PyQt5 the selected completion is taken from the list of results
+    SearchResultModel = None
+
+
+class SearchBenchmark:
+    """Generates the synthetic geopackages and measures the search pipeline"""
+
+    ADDRESS_GEOPACKAGE = "addresses.gpkg"
+    GEOSEARCH_GEOPACKAGE = "search_objects.gpkg"
+    # same values as in Search
+    MIN_PATTERN_LENGTH = 3
+    MAX_RESULTS = 500
+    SRID = 4326
+    # bounding box of the synthetic points (Germany)
+    EXTENT = (5.9, 47.3, 15.0, 55.0)
+    BATCH_SIZE = 50000
+
+    STREETS = ["Haupt", "Mühlen", "Bahnhof", "Schiller", "Goethe", "Linden", "Kirch", "Berg", "Wald", "Rosen",
+               "Birken", "Eichen", "Garten", "Schul", "Markt", "Dorf", "Feld", "Wiesen", "Sonnen", "Tannen",
+               "Friedhof", "Jäger", "Brunnen", "Schützen", "Kloster", "Weiher", "Burg", "Hof", "Mozart", "Luisen"]
+    STREET_TYPES = ["straße", "weg", "gasse", "allee", "platz", "ring", "damm", "pfad"]
+    TOWNS = ["Bonn", "Köln", "Düsseldorf", "Münster", "Essen", "Dortmund", "Aachen", "Siegen", "Hagen", "Wuppertal",
+             "Bielefeld", "Paderborn", "Gütersloh", "Lüdenscheid", "Mönchengladbach", "Neuss", "Krefeld", "Soest"]
+    OBJECT_TYPES = ["Grundschule", "Gymnasium", "Apotheke", "Kindergarten", "Feuerwache", "Krankenhaus", "Rathaus",
+                    "Sporthalle", "Friedhof", "Polizeiwache", "Kirche", "Bahnhof", "Hallenbad", "Bibliothek"]
+
+    def __init__(self, folder: str, seed: int = 1):
+        self.folder = folder
+        self.random = random.Random(seed)
+
+    # generation ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def generate(self, rows: int) -> None:
+        """Writes addresses.gpkg with rows addresses and search_objects.gpkg with rows / 10 objects"""
+        os.makedirs(self.folder, exist_ok=True)
+        self._writeGpkg(os.path.join(self.folder, self.ADDRESS_GEOPACKAGE), "addresses", "address",
+                        self._addresses(rows))
+        self._writeGpkg(os.path.join(self.folder, self.GEOSEARCH_GEOPACKAGE), "objektsuche", "search",
+                        self._objects(max(rows // 10, 1)))
+
+    def addressText(self) -> str:
+        street = self.random.choice(self.STREETS) + self.random.choice(self.STREET_TYPES)
+        return "{} {}, {:05d} {}".format(street, self.random.randint(1, 250), self.random.randint(1067, 99998),
+                                         self.town())
+
+    def town(self) -> str:
+        # a few big towns and many small ones, so some texts are frequent and others rare
+        if self.random.random() < 0.5:
+            return self.random.choice(self.TOWNS)
+        return "Ort {}".format(self.random.randint(1, 5000))
+
+    @staticmethod
+    def encodeGpkgPoint(x: float, y: float, srid: int) -> bytes:
+        """GeoPackage point geometry without envelope, little endian"""
+        return b"GP" + struct.pack("<BBi", 0, 0x01, srid) + struct.pack("<BIdd", 1, 1, x, y)
+
+    # measurement ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def typingSequences(self, path: str, count: int, typos: bool) -> List[str]:
+        """Texts typed in the search: full addresses, street + number, town names (with typos if wanted).
+        They are taken from random rows of the address table in path, so each typed prefix finds rows."""
+        texts = []
+        for i, address in enumerate(self.sampleAddresses(path, count)):
+            if i % 3 == 0:
+                text = address
+            elif i % 3 == 1:
+                text = address.split(",")[0]
+            else:
+                text = address.split(" ", 3)[-1]
+            if typos and len(text) > 6:
+                position = self.random.randint(1, len(text) - 2)
+                text = text[:position] + text[position + 1] + text[position] + text[position + 2:]
+            texts.append(text)
+        return texts
+
+    def sampleAddresses(self, path: str, count: int) -> List[str]:
+        """count addresses of random rows of the address table (repeated if the table has less rows)"""
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            maxRowid = conn.execute(f'SELECT max(rowid) FROM "{SearchSource.TABLE_NAME}"').fetchone()[0] or 0
+            if maxRowid == 0:
+                return []
+            rowids = (self.random.sample(range(1, maxRowid + 1), count) if count <= maxRowid else
+                      self.random.choices(range(1, maxRowid + 1), k=count))
+            query = (f'SELECT "{SearchSource.COLUMN_NAME}" FROM "{SearchSource.TABLE_NAME}" '
+                     f'WHERE rowid = ? AND "{SearchSource.COLUMN_NAME}" IS NOT NULL')
+            # missing rowids (deleted rows) are skipped
+            return [row[0] for row in (conn.execute(query, [rowid]).fetchone() for rowid in rowids) if row]
+        finally:
+            conn.close()
+
+    def run(self, sources: List[SearchSource], texts: List[str], federated: bool, fuzzy: bool,
+            center: Optional[Tuple[float, float, float]] = None) -> Dict:
+        """Types each text letter by letter like Search.textChanged does and measures each step in ms.
+        With center (x, y, radius in EPSG:4326) the results are sorted by the distance to it."""
+        centers = {self.SRID: center} if center else None
+        engine = FederatedSearchEngine(sources) if federated else None
+        conns = [source.connect() for source in sources] if not federated else []
+        source = sources[0]
+        # coordinates by text like Search.getPoi and FederatedSearch.getPoi
+        queryGeomFn = engine.queryGeom if engine else (lambda geomText: source.queryGeom(conns[0], geomText))
+        completionModel = SearchResultModel() if SearchResultModel is not None else None
+        queryTimes: List[float] = []
+        refineTimes: List[float] = []
+        poiTimes: List[float] = []
+        poiByTextTimes: List[float] = []
+        try:
+            for text in texts:
+                modelPattern: Optional[str] = None
+                model: List[SearchResult] = []
+                isComplete = False
+                for end in range(self.MIN_PATTERN_LENGTH, len(text) + 1):
+                    pattern = text[:end]
+                    start = time.perf_counter()
+                    if (not fuzzy and modelPattern is not None and isComplete and
+                            modelPattern.lower() in pattern.lower()):
+                        model = [result for result in model if pattern.lower() in result.text.lower()]
+                        refineTimes.append((time.perf_counter() - start) * 1000)
+                        continue
+                    if engine:
+                        results = engine.search(pattern, self.MAX_RESULTS + 1, centers=centers)
+                    else:
+                        results = source.query(conns[0], pattern, self.MAX_RESULTS + 1, centers)
+                    isComplete = len(results) <= self.MAX_RESULTS
+                    modelPattern, model = pattern, results[:self.MAX_RESULTS]
+                    queryTimes.append((time.perf_counter() - start) * 1000)
+
+                # selecting the first completion (Search.getPoi with the index of the completer), without
+                # completion the coordinates are queried by the text
+                if completionModel is not None:
+                    completionModel.setResults(model)
+                start = time.perf_counter()
+                self.getPoi(completionModel, model, queryGeomFn, text)
+                (poiTimes if model else poiByTextTimes).append((time.perf_counter() - start) * 1000)
+        finally:
+            for conn in conns:
+                conn.close()
+            if engine:
+                engine.close()
+
+        return {
+            "texts": len(texts),
+            "query": self.percentiles(queryTimes),
+            "refine": self.percentiles(refineTimes),
+            "getPoi": self.percentiles(poiTimes),
+            "getPoiByText": self.percentiles(poiByTextTimes),
+            "processPeakMb": self.processPeakMb(),
+        }
+
+    def getPoi(self, completionModel, results: List[SearchResult],
+               queryGeomFn: Callable[[str], Optional[Tuple[float, float, int]]],
+               text: str) -> Optional[Tuple[float, float, int]]:
+        """Coordinates of the first completion like Search.getPoi: the result is read from the model index
+        (RESULT_ROLE), the sources are queried by the text (queryGeomFn) only if the result has no coordinates"""
+        result: Optional[SearchResult] = None
+        if completionModel is not None:
+            if completionModel.rowCount():
+                result = completionModel.data(completionModel.index(0), SearchResultModel.RESULT_ROLE)
+        elif results:
+            result = results[0]
+        if result is not None and result.x is not None:
+            return result.x, result.y, result.srid
+        return queryGeomFn(text)
+
+    @staticmethod
+    def processPeakMb() -> Optional[float]:
+        """Peak memory of the process in MB, None if it can not be measured"""
+        if resource is not None:
+            # ru_maxrss is kB on Linux, bytes on macOS
+            maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return round(maxRss / (2 ** 20 if sys.platform == "darwin" else 1024), 1)
+        if psutil is not None and hasattr(psutil.Process().memory_info(), "peak_wset"):  # Windows
+            return round(psutil.Process().memory_info().peak_wset / 2 ** 20, 1)
+        return None
+
+    @staticmethod
+    def percentiles(times: List[float]) -> Dict[str, float]:
+        if len(times) < 2:
+            return {"count": len(times)}
+        quantiles = statistics.quantiles(times, n=100, method="inclusive")
+        return {"count": len(times), "p50": round(quantiles[49], 3), "p95": round(quantiles[94], 3),
+                "p99": round(quantiles[98], 3), "max": round(max(times), 3)}
+
+    @staticmethod
+    def connect(path: str, factory=sqlite3.Connection) -> sqlite3.Connection:
+        """Connection with the SQL functions used by the search queries: from mod_spatialite if it can be loaded,
+        otherwise as Python functions (reads only GeoPackage points)"""
+        conn = sqlite3.connect(path, check_same_thread=False, factory=factory)
+        try:
+            conn.enable_load_extension(True)
+            conn.load_extension("mod_spatialite")
+            return conn
+        except (AttributeError, sqlite3.OperationalError):
+            pass
+
+        def coordinate(index: int):
+            def function(blob):
+                point = SearchIndex.decodeGpkgPoint(blob)
+                return point[index] if point else None
+            return function
+
+        conn.create_function("EnableGpkgAmphibiousMode", 0, lambda: None)
+        conn.create_function("X", 1, coordinate(0), deterministic=True)
+        conn.create_function("Y", 1, coordinate(1), deterministic=True)
+        conn.create_function("SRID", 1, coordinate(2), deterministic=True)
+        return conn
+
+    @staticmethod
+    def countRows(path: str) -> int:
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute(f'SELECT count(*) FROM "{SearchSource.TABLE_NAME}"').fetchone()[0]
+        finally:
+            conn.close()
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _addresses(self, rows: int) -> Iterator[Tuple[str, float, float]]:
+        minX, minY, maxX, maxY = self.EXTENT
+        for _ in range(rows):
+            yield self.addressText(), self.random.uniform(minX, maxX), self.random.uniform(minY, maxY)
+
+    def _objects(self, rows: int) -> Iterator[Tuple[str, float, float]]:
+        minX, minY, maxX, maxY = self.EXTENT
+        for _ in range(rows):
+            text = "{} {}, {}".format(self.random.choice(self.OBJECT_TYPES), self.random.choice(self.STREETS),
+                                      self.town())
+            yield text, self.random.uniform(minX, maxX), self.random.uniform(minY, maxY)
+
+    def _writeGpkg(self, path: str, table: str, column: str, rows: Iterator[Tuple[str, float, float]]) -> None:
+        """Minimal GeoPackage: point table with spatial index rtree_<table>_geom"""
+        if os.path.isfile(path):
+            os.remove(path)
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute("PRAGMA application_id = 1196444487")  # GPKG
+            conn.execute("PRAGMA user_version = 10300")
+            conn.execute("CREATE TABLE gpkg_spatial_ref_sys (srs_name TEXT NOT NULL, srs_id INTEGER PRIMARY KEY, "
+                         "organization TEXT NOT NULL, organization_coordsys_id INTEGER NOT NULL, "
+                         "definition TEXT NOT NULL, description TEXT)")
+            conn.execute("INSERT INTO gpkg_spatial_ref_sys VALUES ('WGS 84', 4326, 'EPSG', 4326, "
+                         "'GEOGCS[\"WGS 84\",DATUM[\"WGS_1984\",SPHEROID[\"WGS 84\",6378137,298.257223563]],"
+                         "PRIMEM[\"Greenwich\",0],UNIT[\"degree\",0.0174532925199433]]', NULL)")
+            conn.execute("CREATE TABLE gpkg_contents (table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL, "
+                         "identifier TEXT UNIQUE, description TEXT DEFAULT '', last_change DATETIME, "
+                         "min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, srs_id INTEGER)")
+            conn.execute("INSERT INTO gpkg_contents VALUES (?, 'features', ?, '', "
+                         "strftime('%Y-%m-%dT%H:%M:%fZ', 'now'), ?, ?, ?, ?, ?)",
+                         [table, table, *self.EXTENT, self.SRID])
+            conn.execute("CREATE TABLE gpkg_geometry_columns (table_name TEXT NOT NULL, column_name TEXT NOT NULL, "
+                         "geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL, z TINYINT NOT NULL, "
+                         "m TINYINT NOT NULL, CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name))")
+            conn.execute("INSERT INTO gpkg_geometry_columns VALUES (?, 'geom', 'POINT', ?, 0, 0)", [table, self.SRID])
+            conn.execute("CREATE TABLE gpkg_extensions (table_name TEXT, column_name TEXT, "
+                         "extension_name TEXT NOT NULL, definition TEXT NOT NULL, scope TEXT NOT NULL)")
+            conn.execute("INSERT INTO gpkg_extensions VALUES (?, 'geom', 'gpkg_rtree_index', "
+                         "'http://www.geopackage.org/spec120/#extension_rtree', 'write-only')", [table])
+            conn.execute(f'CREATE TABLE "{table}" (fid INTEGER PRIMARY KEY AUTOINCREMENT, geom POINT, '
+                         f'"{column}" TEXT)')
+            conn.execute(f'CREATE VIRTUAL TABLE "rtree_{table}_geom" USING rtree(id, minx, maxx, miny, maxy)')
+
+            fid = 0
+            batch = []
+            for text, x, y in rows:
+                fid += 1
+                batch.append((fid, x, y, text))
+                if len(batch) >= self.BATCH_SIZE:
+                    self._insertBatch(conn, table, column, batch)
+                    batch = []
+            self._insertBatch(conn, table, column, batch)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _insertBatch(self, conn: sqlite3.Connection, table: str, column: str,
+                     batch: List[Tuple[int, float, float, str]]) -> None:
+        conn.executemany(f'INSERT INTO "{table}" (fid, geom, "{column}") VALUES (?, ?, ?)',
+                         [(fid, self.encodeGpkgPoint(x, y, self.SRID), text) for fid, x, y, text in batch])
+        conn.executemany(f'INSERT INTO "rtree_{table}_geom" VALUES (?, ?, ?, ?, ?)',
+                         [(fid, x, x, y, y) for fid, x, y, _ in batch])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark of the MoFa4Q address and object search.")
+    parser.add_argument("folder", help="folder with addresses.gpkg/search_objects.gpkg")
+    parser.add_argument("--generate", action="store_true", help="(re)generates the synthetic geopackages")
+    parser.add_argument("--rows", type=int, default=100000, help="number of addresses to generate (10k - 5M)")
+    parser.add_argument("--index", action="store_true", help="(re)builds the search index before measuring")
+    parser.add_argument("--texts", type=int, default=100, help="number of typed texts")
+    parser.add_argument("--fuzzy", action="store_true", help="typo tolerant search, the typed texts contain typos")
+    parser.add_argument("--federated", action="store_true", help="searches addresses and objects together")
+    parser.add_argument("--center", type=float, nargs=3, metavar=("X", "Y", "RADIUS"),
+                        help="sorts the results by the distance to this canvas center (EPSG:4326, e.g. 7.1 50.7 0.05)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="repeats the run with tracemalloc to measure the peak of the Python allocations")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="writes the result additionally in this file")
+    args = parser.parse_args(argv)
+
+    benchmark = SearchBenchmark(args.folder, args.seed)
+    addressPath = os.path.join(args.folder, SearchBenchmark.ADDRESS_GEOPACKAGE)
+    objectPath = os.path.join(args.folder, SearchBenchmark.GEOSEARCH_GEOPACKAGE)
+    if args.generate:
+        start = time.perf_counter()
+        benchmark.generate(args.rows)
+        print(f"generated {args.rows} addresses in {time.perf_counter() - start:.1f} s")
+    if args.index:
+        for path in (addressPath, objectPath):
+            table, column = SearchIndex.DEFAULT_TABLES[os.path.basename(path)]
+            SearchIndex.build(path, table, column)
+    if not os.path.isfile(addressPath):
+        print(f"{addressPath} not found, use --generate")
+        return 1
+
+    sources = [SearchSource(addressPath, SearchBenchmark.connect, fuzzy=args.fuzzy)]
+    if args.federated:
+        sources.append(ObjSearchSource(objectPath, SearchBenchmark.connect, fuzzy=args.fuzzy))
+    texts = benchmark.typingSequences(addressPath, args.texts, args.fuzzy)
+    result = benchmark.run(sources, texts, args.federated, args.fuzzy, args.center)
+    if args.tracemalloc:
+        # own run: tracemalloc slows down the Python code a lot and would distort the latencies
+        tracemalloc.start()
+        benchmark.run(sources, texts, args.federated, args.fuzzy, args.center)
+        result["pythonPeakMb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+        tracemalloc.stop()
+    result["rows"] = SearchBenchmark.countRows(addressPath)
+    result["index"] = SearchIndex.isUpToDate(addressPath, SearchSource.TABLE_NAME, SearchSource.COLUMN_NAME)
+    result["fuzzy"] = args.fuzzy
+    result["federated"] = args.federated
+    result["center"] = args.center
+
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, 'w', encoding='utf8') as outfile:
+            json.dump(result, outfile, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
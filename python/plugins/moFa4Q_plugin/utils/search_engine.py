@@ -0,0 +1,132 @@
+import math
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .fuzzy_match import FuzzyMatch
+from .search_source import SearchResult
+
+
+class FederatedSearchEngine:
+    """
+    Queries several search sources concurrently and merges their results ranked by relevance
+    (exact > prefix > word prefix > substring > normalized substring > typos, a matching house number ranks higher).
+
+    Each source gets an own thread, so its connection (opened with source.connect()) is reused by all queries.
+    Sources without database (connect() returns None) are supported as well, e.g. attribute tables of layers.
+    """
+
+    SCORE_EXACT = 100
+    SCORE_PREFIX = 75
+    SCORE_WORD_PREFIX = 60
+    SCORE_SUBSTRING = 40
+    SCORE_NORMALIZED = 30
+    SCORE_TYPO = 10
+    SCORE_HOUSE_NUMBER = 20
+    # number of SQLite VM instructions between two checks whether the running query is stale
+    PROGRESS_STEPS = 1000
+
+    HOUSE_NUMBER_REGEX = re.compile(r"\d+\s?[a-z]?\b")
+
+    def __init__(self, sources: Sequence):
+        self.sources = list(sources)
+        self._executors = [ThreadPoolExecutor(max_workers=1) for _ in self.sources]
+        self._local = threading.local()
+
+    def search(self, pattern: str, limit: int, isStale: Optional[Callable[[], bool]] = None,
+               centers: Optional[Dict[int, Tuple[float, float, float]]] = None) -> List[SearchResult]:
+        """Queries all sources (max limit results each) and returns the best limit results.
+        A query is interrupted (sqlite3.OperationalError) as soon as isStale returns True.
+        With centers (see SearchSource.query) results with the same score are sorted by the distance.
+        """
+        futures = [executor.submit(self._querySource, source, pattern, limit, isStale, centers)
+                   for source, executor in zip(self.sources, self._executors)]
+        results: List[SearchResult] = []
+        for future in futures:
+            results.extend(future.result())
+        return self.rank(results, pattern)[:limit]
+
+    def queryGeom(self, text: str) -> Optional[Tuple[float, float, int]]:
+        """Coordinates (x, y, srid) of the row with exactly this text in the first source which has it.
+        Each source is queried in its thread with its connection (sources without queryGeom are skipped)."""
+        for source, executor in zip(self.sources, self._executors):
+            if hasattr(source, 'queryGeom'):
+                result = executor.submit(self._queryGeomInSource, source, text).result()
+                if result is not None:
+                    return result
+        return None
+
+    def close(self) -> None:
+        """Closes the connections in their threads and stops the threads"""
+        for executor in self._executors:
+            executor.submit(self._closeConnections)
+            executor.shutdown(wait=True)
+
+    @classmethod
+    def score(cls, text: str, pattern: str) -> int:
+        text = text.lower()
+        pattern = pattern.lower().strip()
+        if text == pattern:
+            score = cls.SCORE_EXACT
+        elif text.startswith(pattern):
+            score = cls.SCORE_PREFIX
+        elif re.search(r"\b" + re.escape(pattern), text):
+            score = cls.SCORE_WORD_PREFIX
+        elif pattern in text:
+            score = cls.SCORE_SUBSTRING
+        else:
+            # typo tolerant search: less points for each typo
+            distance = FuzzyMatch.substringDistance(FuzzyMatch.normalize(pattern), FuzzyMatch.normalize(text))
+            score = max(cls.SCORE_NORMALIZED - cls.SCORE_TYPO * distance, 0)
+
+        # "hauptstraße 1" should show "Hauptstraße 1" before "Hauptstraße 10"
+        houseNumbers = cls.HOUSE_NUMBER_REGEX.findall(pattern)
+        if houseNumbers and houseNumbers[-1] in cls.HOUSE_NUMBER_REGEX.findall(text):
+            score += cls.SCORE_HOUSE_NUMBER
+        return score
+
+    @classmethod
+    def rank(cls, results: List[SearchResult], pattern: str) -> List[SearchResult]:
+        """Sorts by score, then nearer and shorter texts first"""
+        return sorted(results, key=lambda result: (-cls.score(result.text, pattern),
+                                                   math.inf if result.distance is None else result.distance,
+                                                   len(result.text), result.text))
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _querySource(self, source, pattern: str, limit: int, isStale: Optional[Callable[[], bool]],
+                     centers: Optional[Dict[int, Tuple[float, float, float]]]) -> List[SearchResult]:
+        """Runs in the thread of the source"""
+        conn = self._connection(source)
+        if conn is None:
+            # sources without connection (LayerSearchSource) check isStale themselves
+            return source.query(conn, pattern, limit, centers, isStale=isStale)
+        if isStale:
+            conn.set_progress_handler(lambda: 1 if isStale() else 0, self.PROGRESS_STEPS)
+        return source.query(conn, pattern, limit, centers)
+
+    def _queryGeomInSource(self, source, text: str) -> Optional[Tuple[float, float, int]]:
+        """Runs in the thread of the source"""
+        conn = self._connection(source)
+        if conn is not None:
+            conn.set_progress_handler(None, 0)  # a handler of a previous search must not interrupt the query
+        return source.queryGeom(conn, text)
+
+    def _connection(self, source) -> Optional[sqlite3.Connection]:
+        """Connection of the source in the current thread, opened at the first use"""
+        connections = self._connections()
+        if source not in connections:
+            connections[source] = source.connect()
+        return connections[source]
+
+    def _connections(self) -> dict:
+        if not hasattr(self._local, 'connections'):
+            self._local.connections = {}
+        return self._local.connections
+
+    def _closeConnections(self) -> None:
+        for conn in self._connections().values():
+            if conn is not None:
+                conn.close()
+        self._local.connections = {}
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+/***************************************************************************
+ Full-text sidecar index (FTS5 with trigram tokenizer) for the address and object search.
+
+ The index is an own SQLite file next to the search geopackage (e.g. search/addresses_fts.sqlite).
+ It can be (re)built from the command line:
+
+    python search_index.py <path to geopackages/search>
+    python search_index.py <file.gpkg> --table addresses --column address
+
+ The index contains also the normalized texts (see fuzzy_match.py) for the typo tolerant search.
+
+ With --epsg the coordinates of the geometries are additionally stored reprojected in the columns
+ x_<epsg>/y_<epsg> of the search table (needs mod_spatialite or pyproj):
+
+    python search_index.py <path to geopackages/search> --epsg 25832
+ ***************************************************************************/
+"""
+import argparse
+import os
+import re
+import sqlite3
+import struct
+import sys
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .fuzzy_match import FuzzyMatch
+except ImportError:  # started as script
+    from fuzzy_match import FuzzyMatch
+
+
+class SearchIndex:
+    """Builds and attaches the FTS5 sidecar index of a search geopackage.
+    The rowid of the indexed rows is the rowid (fid) of the source table.
+    """
+
+    SUFFIX = "_fts.sqlite"
+    SCHEMA = "fts"
+    FTS_TABLE = "search_fts"
+    META_TABLE = "search_meta"
+    FUZZY_TABLE = "search_fuzzy"
+    # number of rows containing each trigram of the normalized texts
+    FUZZY_GRAMS = "search_fuzzy_grams"
+    # max rows read from the index for a fuzzy query, before the edit distance is computed
+    FUZZY_CANDIDATES = 1000
+    # rows with typos are searched only if less rows contain the normalized pattern
+    FUZZY_THRESHOLD = 20
+    # default table and column of the geopackages in the folder geopackages/search
+    DEFAULT_TABLES: Dict[str, Tuple[str, str]] = {
+        "addresses.gpkg": ("addresses", "address"),
+        "search_objects.gpkg": ("objektsuche", "search"),
+    }
+
+    @staticmethod
+    def sidecarPath(gpkgPath: str) -> str:
+        """Path of the index file belonging to the geopackage"""
+        return os.path.splitext(gpkgPath)[0] + SearchIndex.SUFFIX
+
+    @staticmethod
+    def sourceSignature(gpkgPath: str) -> Tuple[int, int]:
+        """Size and mtime of the geopackage, used to find out if the index is outdated"""
+        stat = os.stat(gpkgPath)
+        return stat.st_size, int(stat.st_mtime)
+
+    @staticmethod
+    def isTrigramAvailable(conn: sqlite3.Connection) -> bool:
+        """FTS5 trigram tokenizer is available since SQLite 3.34"""
+        try:
+            conn.execute("CREATE VIRTUAL TABLE temp.trigram_check USING fts5(term, tokenize='trigram')")
+            conn.execute("DROP TABLE temp.trigram_check")
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def build(gpkgPath: str, table: str, column: str) -> int:
+        """Creates the index from the column of the table in the geopackage. The file is written in a temporary
+        file and renamed at the end, so a running search never reads a half written index.
+
+        Args:
+            gpkgPath: path of the search geopackage
+            table: table to index (e.g. addresses)
+            column: text column to index (e.g. address)
+
+        Returns:
+            number of indexed rows
+        """
+        indexPath = SearchIndex.sidecarPath(gpkgPath)
+        tmpPath = indexPath + ".tmp"
+        if os.path.isfile(tmpPath):
+            os.remove(tmpPath)
+
+        conn = sqlite3.connect(tmpPath)
+        try:
+            if not SearchIndex.isTrigramAvailable(conn):
+                raise sqlite3.NotSupportedError(
+                    f"SQLite {sqlite3.sqlite_version} does not support the FTS5 trigram tokenizer")
+            conn.execute("ATTACH DATABASE ? AS src", [gpkgPath])
+            conn.execute(f"CREATE VIRTUAL TABLE {SearchIndex.FTS_TABLE} USING fts5(term, tokenize='trigram')")
+            conn.execute(f'INSERT INTO {SearchIndex.FTS_TABLE}(rowid, term) '
+                         f'SELECT rowid, "{column}" FROM src."{table}" WHERE "{column}" IS NOT NULL')
+            count = conn.execute(f"SELECT count(*) FROM {SearchIndex.FTS_TABLE}").fetchone()[0]
+            conn.execute(f"INSERT INTO {SearchIndex.FTS_TABLE}({SearchIndex.FTS_TABLE}) VALUES ('optimize')")
+
+            conn.create_function("normalize", 1, FuzzyMatch.normalize, deterministic=True)
+            conn.execute(f"CREATE VIRTUAL TABLE {SearchIndex.FUZZY_TABLE} USING fts5(term, tokenize='trigram')")
+            conn.execute(f'INSERT INTO {SearchIndex.FUZZY_TABLE}(rowid, term) '
+                         f'SELECT rowid, normalize("{column}") FROM src."{table}" WHERE "{column}" IS NOT NULL')
+            conn.execute(f"INSERT INTO {SearchIndex.FUZZY_TABLE}({SearchIndex.FUZZY_TABLE}) VALUES ('optimize')")
+            conn.execute(f"CREATE VIRTUAL TABLE temp.vocab USING fts5vocab(main, {SearchIndex.FUZZY_TABLE}, row)")
+            conn.execute(f"CREATE TABLE {SearchIndex.FUZZY_GRAMS} (gram TEXT PRIMARY KEY, doc INTEGER) WITHOUT ROWID")
+            conn.execute(f"INSERT INTO {SearchIndex.FUZZY_GRAMS} SELECT term, doc FROM temp.vocab")
+            conn.execute("DROP TABLE temp.vocab")
+
+            size, mtime = SearchIndex.sourceSignature(gpkgPath)
+            conn.execute(f"CREATE TABLE {SearchIndex.META_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+            conn.executemany(f"INSERT INTO {SearchIndex.META_TABLE} VALUES (?, ?)",
+                             [("source_table", table), ("source_column", column),
+                              ("source_size", str(size)), ("source_mtime", str(mtime))])
+            conn.commit()
+            conn.execute("DETACH DATABASE src")
+        finally:
+            conn.close()
+
+        os.replace(tmpPath, indexPath)
+        return count
+
+    @staticmethod
+    def decodeGpkgPoint(blob: bytes) -> Optional[Tuple[float, float, int]]:
+        """Decodes x, y and srs_id of a GeoPackage point geometry (None for other or empty geometries)"""
+        if not blob or blob[:2] != b"GP":
+            return None
+        flags = blob[3]
+        if flags & 0x10:  # empty geometry
+            return None
+        headerOrder = "<" if flags & 0x01 else ">"
+        srsId = struct.unpack(headerOrder + "i", blob[4:8])[0]
+        envelopeSize = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}.get((flags >> 1) & 0x07, 0)
+        wkb = blob[8 + envelopeSize:]
+        wkbOrder = "<" if wkb[0] == 1 else ">"
+        geomType = struct.unpack(wkbOrder + "I", wkb[1:5])[0]
+        if geomType % 1000 != 1:  # Point, PointZ, PointM, PointZM
+            return None
+        x, y = struct.unpack(wkbOrder + "dd", wkb[5:21])
+        return x, y, srsId
+
+    @staticmethod
+    def projectedColumns(epsg: int) -> Tuple[str, str]:
+        return f"x_{epsg}", f"y_{epsg}"
+
+    @staticmethod
+    def findProjectedEpsg(conn: sqlite3.Connection, table: str) -> Optional[int]:
+        """EPSG code of the precomputed coordinate columns x_<epsg>/y_<epsg> of the table, if they exist"""
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+        for column in sorted(columns):
+            match = re.fullmatch(r"x_(\d+)", column)
+            if match and f"y_{match.group(1)}" in columns:
+                return int(match.group(1))
+        return None
+
+    @staticmethod
+    def addProjectedCoordinates(gpkgPath: str, table: str, epsg: int, geomColumn: str = "geom") -> int:
+        """Stores the reprojected coordinates of the point geometries in the columns x_<epsg>/y_<epsg>.
+        The transformation is done with mod_spatialite, if it can be loaded, otherwise with pyproj.
+
+        Returns:
+            number of updated rows
+        """
+        xColumn, yColumn = SearchIndex.projectedColumns(epsg)
+        conn = sqlite3.connect(gpkgPath)
+        try:
+            columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+            for column in (xColumn, yColumn):
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE "{table}" ADD COLUMN {column} REAL')
+
+            try:
+                conn.enable_load_extension(True)
+                conn.load_extension("mod_spatialite")
+                conn.execute("SELECT EnableGpkgAmphibiousMode()")
+                count = conn.execute(f'UPDATE "{table}" SET {xColumn} = X(ST_Transform("{geomColumn}", ?)), '
+                                     f'{yColumn} = Y(ST_Transform("{geomColumn}", ?))', [epsg, epsg]).rowcount
+            except (AttributeError, sqlite3.OperationalError):
+                count = SearchIndex._addProjectedCoordinatesWithPyproj(conn, table, epsg, geomColumn)
+            conn.commit()
+        finally:
+            conn.close()
+        return count
+
+    @staticmethod
+    def _addProjectedCoordinatesWithPyproj(conn: sqlite3.Connection, table: str, epsg: int, geomColumn: str) -> int:
+        from pyproj import Transformer
+
+        xColumn, yColumn = SearchIndex.projectedColumns(epsg)
+        transformers = {}
+        updates = []
+        for rowid, blob in conn.execute(f'SELECT rowid, "{geomColumn}" FROM "{table}"'):
+            point = SearchIndex.decodeGpkgPoint(blob)
+            if point is None:
+                continue
+            x, y, srsId = point
+            if srsId not in transformers:
+                transformers[srsId] = Transformer.from_crs(f"EPSG:{srsId}", f"EPSG:{epsg}", always_xy=True)
+            updates.append((*transformers[srsId].transform(x, y), rowid))
+        conn.executemany(f'UPDATE "{table}" SET {xColumn} = ?, {yColumn} = ? WHERE rowid = ?', updates)
+        return len(updates)
+
+    @staticmethod
+    def readMeta(indexPath: str) -> Dict[str, str]:
+        conn = sqlite3.connect(f"file:{indexPath}?mode=ro", uri=True)
+        try:
+            return dict(conn.execute(f"SELECT key, value FROM {SearchIndex.META_TABLE}").fetchall())
+        finally:
+            conn.close()
+
+    @staticmethod
+    def isUpToDate(gpkgPath: str, table: str, column: str) -> bool:
+        """Checks whether the index exists, belongs to table/column and the geopackage has not been replaced since"""
+        indexPath = SearchIndex.sidecarPath(gpkgPath)
+        if not os.path.isfile(indexPath) or not os.path.isfile(gpkgPath):
+            return False
+        try:
+            meta = SearchIndex.readMeta(indexPath)
+        except sqlite3.Error:
+            return False
+        size, mtime = SearchIndex.sourceSignature(gpkgPath)
+        return (meta.get("source_table") == table and meta.get("source_column") == column and
+                meta.get("source_size") == str(size) and meta.get("source_mtime") == str(mtime))
+
+    @staticmethod
+    def attach(conn: sqlite3.Connection, gpkgPath: str, table: str, column: str) -> bool:
+        """Attaches the index to an open connection of the geopackage as schema <SCHEMA>, if it is usable.
+
+        Returns:
+            True if the index has been attached, False if the search has to use the geopackage table (fallback)
+        """
+        if not SearchIndex.isUpToDate(gpkgPath, table, column):
+            return False
+        try:
+            conn.execute(f"ATTACH DATABASE ? AS {SearchIndex.SCHEMA}", [SearchIndex.sidecarPath(gpkgPath)])
+            conn.execute(f"SELECT rowid FROM {SearchIndex.SCHEMA}.{SearchIndex.FTS_TABLE} LIMIT 1").fetchall()
+        except sqlite3.Error:
+            return False
+        return True
+
+    @staticmethod
+    def hasFuzzy(conn: sqlite3.Connection) -> bool:
+        """True if the attached index contains the normalized texts (indexes built before have not)"""
+        return conn.execute(f"SELECT count(*) FROM {SearchIndex.SCHEMA}.sqlite_master WHERE name = ?",
+                            [SearchIndex.FUZZY_GRAMS]).fetchone()[0] > 0
+
+    @staticmethod
+    def queryFuzzy(conn: sqlite3.Connection, pattern: str, limit: int) -> List[int]:
+        """Rowids of max limit rows containing the pattern with at most FuzzyMatch.maxDistance typos, ordered by
+        distance. The pattern is normalized, so "Strasse" finds "Straße" and "Muehlenweg" "Mühlenweg" (distance 0).
+
+        Rows containing the normalized pattern come first. If they are less than FUZZY_THRESHOLD, the candidates are
+        the rows containing one of the rarest 3k+1 trigrams of the pattern (k = tolerated typos): k typos change at
+        most 3k trigrams, so each match contains at least one of them. Only rows sharing enough trigrams with the
+        pattern are compared with the edit distance.
+        """
+        normPattern = FuzzyMatch.normalize(pattern)
+        fuzzyTable = f"{SearchIndex.SCHEMA}.{SearchIndex.FUZZY_TABLE}"
+        rowids = [row[0] for row in conn.execute(f"SELECT rowid FROM {fuzzyTable} WHERE term LIKE ? LIMIT ?",
+                                                 ['%' + normPattern + '%', limit])]
+        maxDistance = FuzzyMatch.maxDistance(normPattern)
+        grams = FuzzyMatch.trigrams(normPattern)
+        if len(rowids) >= min(limit, SearchIndex.FUZZY_THRESHOLD) or maxDistance == 0 or not grams:
+            return rowids
+
+        gramTable = f"{SearchIndex.SCHEMA}.{SearchIndex.FUZZY_GRAMS}"
+        docCounts = conn.execute(f"SELECT gram, doc FROM {gramTable} WHERE gram IN ({','.join('?' * len(grams))})",
+                                 list(grams)).fetchall()
+        rareGrams = [gram for gram, _ in sorted(docCounts, key=lambda row: row[1])][:3 * maxDistance + 1]
+        if not rareGrams:
+            return rowids
+        match = " OR ".join('"{}"'.format(gram.replace('"', '""')) for gram in rareGrams)
+        candidates = conn.execute(f"SELECT rowid, term FROM {fuzzyTable} WHERE {SearchIndex.FUZZY_TABLE} MATCH ? "
+                                  f"LIMIT ?", [match, SearchIndex.FUZZY_CANDIDATES])
+
+        found = set(rowids)
+        minShared = len(grams) - 3 * maxDistance
+        matches = []
+        for rowid, term in candidates:
+            if rowid in found or (minShared > 1 and len(grams & FuzzyMatch.trigrams(term)) < minShared):
+                continue
+            distance = FuzzyMatch.substringDistance(normPattern, term)
+            if 0 < distance <= maxDistance:
+                matches.append((distance, len(term), rowid))
+        matches.sort()
+        return rowids + [rowid for _, _, rowid in matches[:limit - len(rowids)]]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Builds the FTS5 sidecar index for the MoFa4Q search geopackages.")
+    parser.add_argument("path", help="search geopackage or folder containing addresses.gpkg/search_objects.gpkg")
+    parser.add_argument("--table", help="table to index (default depends on the file name)")
+    parser.add_argument("--column", help="column to index (default depends on the file name)")
+    parser.add_argument("--epsg", type=int, help="stores also the coordinates reprojected in this EPSG (e.g. 25832)")
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.path):
+        gpkgs = [os.path.join(args.path, name) for name in SearchIndex.DEFAULT_TABLES
+                 if os.path.isfile(os.path.join(args.path, name))]
+    else:
+        gpkgs = [args.path]
+
+    if not gpkgs:
+        print(f"No search geopackage found in {args.path}")
+        return 1
+
+    for gpkgPath in gpkgs:
+        table, column = SearchIndex.DEFAULT_TABLES.get(os.path.basename(gpkgPath), (None, None))
+        table = args.table or table
+        column = args.column or column
+        if not table or not column:
+            print(f"{gpkgPath}: --table and --column are required")
+            return 1
+        if args.epsg:
+            # before the index is built: the index stores size and mtime of the changed geopackage
+            count = SearchIndex.addProjectedCoordinates(gpkgPath, table, args.epsg)
+            print(f"{gpkgPath}: {count} coordinates stored in EPSG:{args.epsg}")
+        count = SearchIndex.build(gpkgPath, table, column)
+        print(f"{gpkgPath}: {count} rows indexed in {SearchIndex.sidecarPath(gpkgPath)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
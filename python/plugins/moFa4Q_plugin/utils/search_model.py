@@ -0,0 +1,36 @@
+from typing import List
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+
+from .search_source import SearchResult
+
+
+class SearchResultModel(QAbstractListModel):
+    """List model for QCompleter: shows the text, the whole SearchResult is available with RESULT_ROLE"""
+
+    RESULT_ROLE = Qt.UserRole + 1
+
+    def __init__(self):
+        super().__init__()
+        self._results: List[SearchResult] = []
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._results)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._results):
+            return None
+        result = self._results[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return result.text
+        if role == self.RESULT_ROLE:
+            return result
+        return None
+
+    def results(self) -> List[SearchResult]:
+        return self._results
+
+    def setResults(self, results: List[SearchResult]) -> None:
+        self.beginResetModel()
+        self._results = list(results)
+        self.endResetModel()
@@ -0,0 +1,279 @@
+import math
+import os
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .search_index import SearchIndex
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """One completion of the search with the row id and the decoded coordinates of its geometry.
+    The field order is the column order of the search queries."""
+    fid: int
+    text: str
+    x: Optional[float]
+    y: Optional[float]
+    srid: Optional[int]
+    # coordinates precomputed in the geopackage (see SearchIndex.addProjectedCoordinates)
+    projX: Optional[float] = None
+    projY: Optional[float] = None
+    projSrid: Optional[int] = None
+    # squared distance to the canvas center (only if the results are sorted by it)
+    distance: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class SourceState:
+    """What one connection of a source can use, decided for the geopackage and the index with these signatures
+    (size, mtime, None if the index does not exist)"""
+    signature: Tuple[Tuple[int, int], Optional[Tuple[int, int]]]
+    hasIndex: bool
+    hasFuzzy: bool
+    hasRtree: bool
+    # search queries with the precomputed coordinates of the geopackage (see SearchSource._buildQueries)
+    queries: Dict[str, str]
+
+
+class SearchConnection(sqlite3.Connection):
+    """Connection opened by SearchSource.connect, keeps the state of the source for this connection"""
+    state: Optional[SourceState] = None
+
+
+def spatialiteConnect(path: str, **kwargs) -> sqlite3.Connection:
+    import qgis.utils
+    return qgis.utils.spatialite_connect(path, **kwargs)
+
+
+class SearchSource:
+    """
+    Queries the search table of one geopackage. The FTS5 sidecar index (see search_index.py) is used if it is
+    up to date, the precomputed coordinates x_<epsg>/y_<epsg> if they exist.
+    If a center is given (in the CRS of the table) the results are sorted by the distance to it. The distance is
+    computed in SQL from the bounding boxes in the spatial index of the geopackage (RTREE_TABLE).
+    The source holds no connection: each thread has to open its own one with connect(). What a connection can use
+    (index, spatial index, precomputed coordinates) is kept in its SourceState and decided again as soon as the
+    geopackage or the index has been replaced, so a connection never reads an index which does not belong to the
+    geopackage.
+    """
+    NAME = "addresses"
+    TABLE_NAME = "addresses"
+    COLUMN_NAME = "address"
+    # {projected}: precomputed coordinates and their EPSG code (or NULLs)
+    STR_QUERY = ("SELECT rowid, address, X(geom), Y(geom), SRID(geom){projected} FROM addresses "
+                 "WHERE address LIKE ? LIMIT ?")
+    STR_QUERY_FTS = ("SELECT t.rowid, t.address, X(t.geom), Y(t.geom), SRID(t.geom){projected} "
+                     f"FROM {SearchIndex.SCHEMA}.{SearchIndex.FTS_TABLE} f JOIN addresses t ON t.rowid = f.rowid "
+                     "WHERE f.term LIKE ? LIMIT ?")
+    # {rowids}: rowids found by SearchIndex.queryFuzzy
+    STR_QUERY_ROWIDS = ("SELECT rowid, address, X(geom), Y(geom), SRID(geom){projected} FROM addresses "
+                        "WHERE rowid IN ({rowids})")
+    RTREE_TABLE = "rtree_addresses_geom"
+    # up to NEAR_CANDIDATES rows containing the pattern are sorted directly by the distance, with more rows
+    # NEAR_STEPS windows are searched around the center (each NEAR_FACTOR times larger) before all rows are sorted
+    NEAR_CANDIDATES = 5000
+    NEAR_STEPS = 6
+    NEAR_FACTOR = 2
+    # squared distance of the bounding box center to :x/:y, :kx2 corrects the length of a degree of longitude
+    STR_DISTANCE = ("((r.minx + r.maxx) / 2 - :x) * ((r.minx + r.maxx) / 2 - :x) * :kx2 + "
+                    "((r.miny + r.maxy) / 2 - :y) * ((r.miny + r.maxy) / 2 - :y)")
+    # {near}: one of the following queries, which return the rowids and distances of the nearest rows
+    STR_QUERY_NEAR = ("SELECT t.rowid, t.address, X(t.geom), Y(t.geom), SRID(t.geom){projected}, n.d FROM ({near}) n "
+                      "JOIN addresses t ON t.rowid = n.id ORDER BY n.d IS NULL, n.d")
+    STR_NEAR_LIKE = ("SELECT t.rowid AS id, {distance} AS d FROM addresses t "
+                     "LEFT JOIN rtree_addresses_geom r ON r.id = t.rowid "
+                     "WHERE t.address LIKE :pattern ORDER BY d IS NULL, d LIMIT :limit")
+    STR_NEAR_FTS = ("SELECT f.rowid AS id, {distance} AS d "
+                    f"FROM {SearchIndex.SCHEMA}.{SearchIndex.FTS_TABLE} f "
+                    "LEFT JOIN {rtree} r ON r.id = f.rowid "
+                    "WHERE f.term LIKE :pattern ORDER BY d IS NULL, d LIMIT :limit")
+    STR_COUNT = "SELECT count(*) FROM (SELECT 1 FROM addresses WHERE address LIKE :pattern LIMIT :candidates)"
+    STR_COUNT_FTS = ("SELECT count(*) FROM (SELECT 1 "
+                     f"FROM {SearchIndex.SCHEMA}.{SearchIndex.FTS_TABLE} WHERE term LIKE :pattern LIMIT :candidates)")
+    # rows in the window :x0/:y0 - :x1/:y1, read through the spatial index
+    STR_NEAR_WINDOW = ("SELECT r.id AS id, {distance} AS d FROM rtree_addresses_geom r "
+                       "JOIN addresses t ON t.rowid = r.id "
+                       "WHERE r.maxx >= :x0 AND r.minx <= :x1 AND r.maxy >= :y0 AND r.miny <= :y1 "
+                       "AND t.address LIKE :pattern ORDER BY d LIMIT :limit")
+    STR_QUERY_GEOM = "SELECT X(geom), Y(geom), SRID(geom) FROM addresses WHERE address = ?"
+    STR_SRS_ID = "SELECT srs_id FROM gpkg_geometry_columns WHERE table_name = ?"
+
+    def __init__(self, filePath: str, connectFn: Callable[..., sqlite3.Connection] = spatialiteConnect,
+                 fuzzy: bool = False):
+        """
+        Args:
+            filePath: path of the search geopackage
+            connectFn: opens a connection to a path, has to accept the keyword argument factory (sqlite3.connect)
+            fuzzy: typo tolerant search, if the index contains the normalized texts
+        """
+        self.filePath = filePath
+        self.connectFn = connectFn
+        self.fuzzy = fuzzy
+        self.srsId = self._readSrsId()
+
+    def connect(self) -> SearchConnection:
+        """Opens a connection to the geopackage with the index attached (if available)"""
+        conn = self.connectFn(self.filePath, factory=SearchConnection)
+        conn.execute("select EnableGpkgAmphibiousMode()")
+        self._state(conn)
+        return conn
+
+    def query(self, conn: sqlite3.Connection, pattern: str, limit: int,
+              centers: Optional[Dict[int, Tuple[float, float]]] = None) -> List[SearchResult]:
+        """Returns max limit results containing the pattern (in fuzzy mode also with typos, best matches first).
+
+        Args:
+            centers: canvas center in the CRS of the sources by srs_id. The results near the center come first.
+        """
+        state = self._state(conn)
+        if self.fuzzy and state.hasFuzzy:
+            return self.queryFuzzy(conn, pattern, limit)
+        center = centers.get(self.srsId) if centers and state.hasRtree else None
+        if center is not None:
+            return self.queryNear(conn, pattern, limit, center)
+        query = state.queries["fts" if state.hasIndex else "like"]
+        c = conn.cursor()
+        try:
+            rows = c.execute(query, ['%' + pattern + '%', limit])
+            return [SearchResult(*sqlRow) for sqlRow in rows]
+        finally:
+            c.close()
+
+    def queryNear(self, conn: sqlite3.Connection, pattern: str, limit: int,
+                  center: Tuple[float, float, float]) -> List[SearchResult]:
+        """Returns max limit results containing the pattern, the nearest to the center first.
+        If many rows contain the pattern, they are searched first in a window around the center (the canvas
+        extent), which is enlarged NEAR_FACTOR times, as long as less than limit rows are found in the window.
+        Only then all rows containing the pattern are sorted.
+
+        Args:
+            center: x, y and radius (half the size of the canvas extent) in the CRS of the table
+        """
+        state = self._state(conn)
+        x, y, radius = center
+        # degrees of longitude are shorter than degrees of latitude
+        kx = math.cos(math.radians(y)) if self.srsId == 4326 else 1.0
+        params = {"pattern": '%' + pattern + '%', "limit": limit, "x": x, "y": y, "kx2": kx * kx}
+        c = conn.cursor()
+        try:
+            count = c.execute(self.STR_COUNT_FTS if state.hasIndex else self.STR_COUNT,
+                              {"pattern": params["pattern"], "candidates": self.NEAR_CANDIDATES}).fetchone()[0]
+            steps = self.NEAR_STEPS if count >= self.NEAR_CANDIDATES and radius > 0 else 0
+            for _ in range(steps):
+                params.update(x0=x - radius / kx, x1=x + radius / kx, y0=y - radius, y1=y + radius)
+                rows = c.execute(state.queries["nearWindow"], params).fetchall()
+                # exact order up to the radius, rows in the corners may be farther than rows outside the window
+                if len(rows) >= limit:
+                    return [SearchResult(*sqlRow) for sqlRow in rows]
+                radius *= self.NEAR_FACTOR
+            rows = c.execute(state.queries["nearFts" if state.hasIndex else "nearLike"], params)
+            return [SearchResult(*sqlRow) for sqlRow in rows]
+        finally:
+            c.close()
+
+    def queryFuzzy(self, conn: sqlite3.Connection, pattern: str, limit: int) -> List[SearchResult]:
+        state = self._state(conn)
+        rowids = SearchIndex.queryFuzzy(conn, pattern, limit)
+        if not rowids:
+            return []
+        c = conn.cursor()
+        try:
+            rows = c.execute(state.queries["rowids"].format(rowids=",".join(str(int(rowid)) for rowid in rowids)))
+            results = {sqlRow[0]: SearchResult(*sqlRow) for sqlRow in rows}
+        finally:
+            c.close()
+        return [results[rowid] for rowid in rowids if rowid in results]
+
+    def queryGeom(self, conn: sqlite3.Connection, text: str) -> Optional[Tuple[float, float, int]]:
+        """Coordinates of the row with exactly this text"""
+        c = conn.cursor()
+        try:
+            return c.execute(self.STR_QUERY_GEOM, [text]).fetchone()
+        finally:
+            c.close()
+
+    def signature(self) -> Tuple[int, int]:
+        return SearchIndex.sourceSignature(self.filePath)
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _state(self, conn: SearchConnection) -> SourceState:
+        """State of the connection, decided again if the geopackage or the index has been replaced since"""
+        indexPath = SearchIndex.sidecarPath(self.filePath)
+        signature = self.signature(), SearchIndex.sourceSignature(indexPath) if os.path.isfile(indexPath) else None
+        if conn.state is None or conn.state.signature != signature:
+            conn.state = self._readState(conn, signature)
+        return conn.state
+
+    def _readState(self, conn: SearchConnection, signature: Tuple) -> SourceState:
+        """(Re)attaches the index if it is up to date for the geopackage and checks its other capabilities"""
+        if conn.state is not None and conn.state.hasIndex:
+            try:
+                conn.execute(f"DETACH DATABASE {SearchIndex.SCHEMA}")
+            except sqlite3.Error:
+                pass
+        hasIndex = SearchIndex.attach(conn, self.filePath, self.TABLE_NAME, self.COLUMN_NAME)
+        hasRtree = conn.execute("SELECT count(*) FROM sqlite_master WHERE name = ?",
+                                [self.RTREE_TABLE]).fetchone()[0] > 0
+        epsg = SearchIndex.findProjectedEpsg(conn, self.TABLE_NAME)
+        return SourceState(signature=signature, hasIndex=hasIndex, hasFuzzy=hasIndex and SearchIndex.hasFuzzy(conn),
+                           hasRtree=hasRtree, queries=self._buildQueries(epsg))
+
+    def _buildQueries(self, epsg: Optional[int]) -> Dict[str, str]:
+        """Search queries returning the precomputed coordinates of epsg (NULLs if None)"""
+        queries = {
+            "like": self.STR_QUERY.format(projected=self._getProjectedColumns('', epsg)),
+            "fts": self.STR_QUERY_FTS.format(projected=self._getProjectedColumns('t.', epsg)),
+            "rowids": self.STR_QUERY_ROWIDS.format(projected=self._getProjectedColumns('', epsg), rowids='{rowids}'),
+        }
+        for kind, near in (("nearLike", self.STR_NEAR_LIKE), ("nearFts", self.STR_NEAR_FTS),
+                           ("nearWindow", self.STR_NEAR_WINDOW)):
+            near = near.format(distance=self.STR_DISTANCE, rtree=self.RTREE_TABLE)
+            queries[kind] = self.STR_QUERY_NEAR.format(projected=self._getProjectedColumns('t.', epsg), near=near)
+        return queries
+
+    def _readSrsId(self) -> Optional[int]:
+        """srs_id of the geometries of the table (CRS of the spatial index)"""
+        try:
+            conn = sqlite3.connect(f"file:{self.filePath}?mode=ro", uri=True)
+            try:
+                row = conn.execute(self.STR_SRS_ID, [self.TABLE_NAME]).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    @staticmethod
+    def _getProjectedColumns(prefix: str, epsg: Optional[int]) -> str:
+        """Columns of the precomputed coordinates for the search queries"""
+        if epsg is None:
+            return ", NULL, NULL, NULL"
+        xColumn, yColumn = SearchIndex.projectedColumns(epsg)
+        return ", {0}{1}, {0}{2}, {3}".format(prefix, xColumn, yColumn, epsg)
+
+
+class ObjSearchSource(SearchSource):
+    """Queries the table objektsuche of the geopackage for the object search"""
+    NAME = "objektsuche"
+    TABLE_NAME = "objektsuche"
+    COLUMN_NAME = "search"
+    STR_QUERY = ("SELECT rowid, search, X(geom), Y(geom), SRID(geom){projected} FROM objektsuche "
+                 "WHERE search LIKE ? LIMIT ?")
+    STR_QUERY_FTS = ("SELECT t.rowid, t.search, X(t.geom), Y(t.geom), SRID(t.geom){projected} "
+                     f"FROM {SearchIndex.SCHEMA}.{SearchIndex.FTS_TABLE} f JOIN objektsuche t ON t.rowid = f.rowid "
+                     "WHERE f.term LIKE ? LIMIT ?")
+    STR_QUERY_ROWIDS = ("SELECT rowid, search, X(geom), Y(geom), SRID(geom){projected} FROM objektsuche "
+                        "WHERE rowid IN ({rowids})")
+    RTREE_TABLE = "rtree_objektsuche_geom"
+    STR_QUERY_NEAR = ("SELECT t.rowid, t.search, X(t.geom), Y(t.geom), SRID(t.geom){projected}, n.d FROM ({near}) n "
+                      "JOIN objektsuche t ON t.rowid = n.id ORDER BY n.d IS NULL, n.d")
+    STR_NEAR_LIKE = ("SELECT t.rowid AS id, {distance} AS d FROM objektsuche t "
+                     "LEFT JOIN rtree_objektsuche_geom r ON r.id = t.rowid "
+                     "WHERE t.search LIKE :pattern ORDER BY d IS NULL, d LIMIT :limit")
+    STR_COUNT = "SELECT count(*) FROM (SELECT 1 FROM objektsuche WHERE search LIKE :pattern LIMIT :candidates)"
+    STR_NEAR_WINDOW = ("SELECT r.id AS id, {distance} AS d FROM rtree_objektsuche_geom r "
+                       "JOIN objektsuche t ON t.rowid = r.id "
+                       "WHERE r.maxx >= :x0 AND r.minx <= :x1 AND r.maxy >= :y0 AND r.miny <= :y1 "
+                       "AND t.search LIKE :pattern ORDER BY d LIMIT :limit")
+    STR_QUERY_GEOM = "SELECT X(geom), Y(geom), SRID(geom) FROM objektsuche WHERE search = ?"
@@ -0,0 +1,108 @@
+import sqlite3
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class SearchWorker(QThread):
+    """
+    Executes the search queries outside the GUI thread with its own database connection.
+    Only the last submitted pattern is executed: a query that is still running when a newer pattern is
+    submitted (or the search is cancelled) is interrupted via the sqlite progress handler.
+    If connectFn returns None (the query opens own connections), queryFn has to check isStale() itself.
+    """
+
+    # number of SQLite VM instructions between two checks whether the running query is stale
+    PROGRESS_STEPS = 1000
+
+    resultsReady = pyqtSignal(int, str, list)  # generation, pattern, results
+    queryFailed = pyqtSignal(str)
+
+    def __init__(self, connectFn: Callable[[], Optional[sqlite3.Connection]],
+                 queryFn: Callable[[Optional[sqlite3.Connection], str], List]):
+        super().__init__()
+        self.connectFn = connectFn
+        self.queryFn = queryFn
+
+        self._condition = threading.Condition()
+        self._pending: Optional[Tuple[int, str]] = None
+        self._generation = 0
+        self._runningGeneration = 0
+        self._isStopped = False
+
+    def submit(self, pattern: str) -> int:
+        """Queues a pattern. A previous pattern not yet executed is dropped, a running one is interrupted.
+
+        Returns:
+            generation of the query, passed again with the signal resultsReady
+        """
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, pattern)
+            self._condition.notify()
+            return self._generation
+
+    def cancel(self) -> None:
+        """Drops the pending pattern and interrupts the running query"""
+        with self._condition:
+            self._generation += 1
+            self._pending = None
+
+    def stop(self) -> None:
+        """Stops the thread and closes its connection - It used when plugin is unloaded"""
+        with self._condition:
+            self._isStopped = True
+            self._generation += 1
+            self._pending = None
+            self._condition.notify()
+        self.wait()
+
+    def run(self) -> None:
+        try:
+            conn = self.connectFn()
+        except Exception as e:
+            self.queryFailed.emit(str(e))
+            return
+
+        if conn is not None:
+            conn.set_progress_handler(self._isStaleHandler, self.PROGRESS_STEPS)
+        try:
+            while True:
+                with self._condition:
+                    while self._pending is None and not self._isStopped:
+                        self._condition.wait()
+                    if self._isStopped:
+                        break
+                    generation, pattern = self._pending
+                    self._pending = None
+                    self._runningGeneration = generation
+
+                try:
+                    results = self.queryFn(conn, pattern)
+                except sqlite3.Error as e:
+                    # an interrupted query raises OperationalError("interrupted"), it is not an error
+                    if generation == self._generation:
+                        self.queryFailed.emit(str(e))
+                    continue
+                except Exception as e:
+                    # any other error must not end the thread, otherwise all following queries are dropped.
+                    # No empty result is delivered: it would be cached as the result of the pattern
+                    if generation == self._generation:
+                        self.queryFailed.emit(repr(e))
+                    continue
+
+                if generation == self._generation:
+                    self.resultsReady.emit(generation, pattern, results)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def isStale(self) -> bool:
+        """True if the running query has been superseded by a newer one or cancelled"""
+        return self._runningGeneration != self._generation
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _isStaleHandler(self) -> int:
+        """Progress handler: a non-zero value aborts the running query"""
+        return 1 if self.isStale() else 0
@@ -0,0 +1,103 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import psutil
+except ImportError:  # the memory is not measured
+    psutil = None
+
+
+class StartupProfiler:
+    """
+    Measures the phases of the plugin startup (runProjectReady): wall time, number of layers added to the project,
+    number of files read (reported by the phase with count) and the change of the process memory (only if psutil
+    is available). The measurement is cheap, so it is always done; the report is written only if it is enabled
+    (isDebug in prj_conf.yaml or the environment variable ENV_VAR).
+    """
+
+    ENV_VAR = "MOFA4Q_PROFILE"
+    MAX_REPORTS = 20
+
+    def __init__(self, countLayersFn: Callable[[], int] = lambda: 0):
+        self.countLayersFn = countLayersFn
+        self.started = datetime.now()
+        self.phases: List[Dict[str, Any]] = []
+        self._current: Optional[Dict[str, Any]] = None
+        self._startTime = time.perf_counter()
+
+    @staticmethod
+    def isEnabledByEnv() -> bool:
+        return os.environ.get(StartupProfiler.ENV_VAR, "") not in ("", "0")
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measures the code of the with statement as phase name (phases are not nested)"""
+        self._current = {"name": name, "files": 0}
+        layers = self.countLayersFn()
+        memory = self._memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current["ms"] = round((time.perf_counter() - start) * 1000, 1)
+            self._current["layers"] = self.countLayersFn() - layers
+            endMemory = self._memory()
+            self._current["memoryMb"] = (round((endMemory - memory) / 2 ** 20, 1)
+                                         if memory is not None and endMemory is not None else None)
+            self.phases.append(self._current)
+            self._current = None
+
+    def count(self, key: str, value: int = 1) -> None:
+        """Adds value to the counter key (e.g. files) of the current phase, ignored outside a phase"""
+        if self._current is not None:
+            self._current[key] = self._current.get(key, 0) + value
+
+    def toDict(self) -> Dict[str, Any]:
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "totalMs": round((time.perf_counter() - self._startTime) * 1000, 1),
+            "memoryMb": self._roundMb(self._memory()),
+            "phases": self.phases,
+        }
+
+    def summary(self) -> str:
+        """One line for each phase, the slowest first"""
+        lines = []
+        for phase in sorted(self.phases, key=lambda p: -p["ms"]):
+            line = f"  {phase['name']}: {phase['ms']:.0f} ms, {phase['layers']} Layer, {phase['files']} Dateien"
+            if phase["memoryMb"] is not None:
+                line += f", {phase['memoryMb']:+.1f} MB"
+            lines.append(line)
+        lines.append(f"  Gesamt: {self.toDict()['totalMs']:.0f} ms")
+        return "\n".join(lines)
+
+    def writeReport(self, folder: str) -> str:
+        """Writes the report as JSON file in folder (only the newest MAX_REPORTS reports are kept)
+
+        Returns:
+            path of the report
+        """
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, "startup_{}.json".format(self.started.strftime("%Y%m%d_%H%M%S")))
+        with open(path, "w", encoding="utf8") as reportFile:
+            json.dump(self.toDict(), reportFile, indent=2)
+        reports = sorted(name for name in os.listdir(folder) if name.startswith("startup_") and name.endswith(".json"))
+        for name in reports[:-self.MAX_REPORTS]:
+            os.remove(os.path.join(folder, name))
+        return path
+
+    # private methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _memory() -> Optional[int]:
+        """Resident memory of the process in bytes"""
+        if psutil is None:
+            return None
+        return psutil.Process().memory_info().rss
+
+    @staticmethod
+    def _roundMb(value: Optional[int]) -> Optional[float]:
+        return round(value / 2 ** 20, 1) if value is not None else None